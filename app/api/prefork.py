@@ -0,0 +1,289 @@
+"""
+Prefork Worker Processes
+------------------------
+Runs graph requests in N worker processes that share one copy of the
+model weights, so throughput scales across cores without memory growing
+linearly with the number of workers.
+
+The parent loads everything once (`initialize(warm_up=False)`), then
+forks the workers:
+- Model weights, tokenizers, the loaded collections (memory-mapped chunk
+  stores, BM25 indexes) are shared copy-on-write. Inference never writes
+  to them, so the pages stay shared.
+- `gc.freeze()` runs before forking, so garbage collections in the workers
+  do not touch (and thereby copy) the pages of the loaded objects.
+- Each worker limits torch to `torch_threads` intra-op threads (default:
+  cores // workers) so the workers do not oversubscribe the CPU.
+- Network clients, locks and thread pools are not fork-safe; their
+  modules reset them in the child (`os.register_at_fork`) and re-create
+  them lazily.
+
+Corpus updates (see app/rag/corpus_version.py) are loaded once, by the
+parent's CorpusWatcher; the workers do not watch. After a swap the parent
+forks a new set of workers, so the new chunk stores and BM25 indexes are
+shared as well. Jobs already running finish on the old workers.
+
+If a worker dies (e.g. killed by the OOM killer), the process pool is
+broken: its pending jobs fail, and a background thread forks a fresh set
+of workers from the parent. Jobs submitted meanwhile fail fast with
+BrokenProcessPool; forking never blocks the caller (the event loop).
+
+Streaming: workers push (stream_id, event) pairs into one queue created
+before the fork; a dispatcher thread in the parent hands each event to
+the response waiting for that stream id.
+
+CPU inference only: CUDA cannot be used in a forked process.
+"""
+
+import gc
+import itertools
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+
+# Set in each worker: the queue shared with the parent at fork time.
+_EVENTS = None
+
+
+# -----------------------------
+# Worker side
+# -----------------------------
+def _init_worker(events, torch_threads: int, warm_up: bool) -> None:
+    global _EVENTS
+    _EVENTS = events
+
+    # Only limit torch if the parent actually loaded it.
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(torch_threads)
+
+    # The parent reloads corpus versions and re-forks the workers.
+    retriever = sys.modules.get("app.rag.retriever")
+    if retriever is not None:
+        retriever.disable_reloads()
+
+    if warm_up:
+        from app.startup import start_warm_up
+
+        start_warm_up()
+
+
+def stream_in_worker(
+    stream_id: int,
+    query: str,
+    profile: Optional[str] = None,
+    deadline: Optional[float] = None,
+) -> None:
+    """
+    Runs the streaming graph in a worker, publishing events to the parent.
+    """
+    from app.api.server import _stream_graph
+
+    _stream_graph(
+        query, lambda event: _EVENTS.put((stream_id, event)), profile, deadline
+    )
+
+
+# -----------------------------
+# Parent side
+# -----------------------------
+def _memory_kb(pid: int) -> Dict[str, int]:
+    """RSS and PSS (shared pages split between processes) of one process."""
+    usage = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    usage[key.lower() + "_kb"] = int(value.split()[0])
+    except OSError:
+        pass  # Not Linux, or the process is gone
+    return usage
+
+
+class PreforkWorkers(Executor):
+    """
+    Forks `workers` processes from the fully loaded parent.
+    An Executor: jobs submitted to it run in the workers.
+    """
+
+    def __init__(self, workers: int, torch_threads: int = 0, warm_up: bool = True):
+        """
+        Args:
+            workers (int): Number of worker processes.
+            torch_threads (int): Intra-op torch threads per worker
+                (0 = cores // workers).
+            warm_up (bool): Run a background warm-up query in each worker.
+        """
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_initialized():
+            raise RuntimeError(
+                "Prefork workers need CPU inference: CUDA cannot be used "
+                "in a forked process"
+            )
+
+        torch_threads = torch_threads or max(1, (os.cpu_count() or 1) // workers)
+        self._context = multiprocessing.get_context("fork")
+        self.events = self._context.SimpleQueue()
+        self.workers = workers
+        self.restarts = 0
+        self.reforks = 0
+        self._initargs = (self.events, torch_threads, warm_up)
+        self._closed = False
+        self._respawning = False
+
+        # Everything loaded so far is long-lived: keep the collector off
+        # those objects so the workers do not copy their pages.
+        gc.collect()
+        gc.freeze()
+
+        self._pool_lock = threading.Lock()
+        self.executor = self._start_pool()
+
+        self._streams: Dict[int, Callable[[Optional[Dict]], None]] = {}
+        self._stream_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="prefork-events", daemon=True
+        )
+        self._dispatcher.start()
+
+        retriever = sys.modules.get("app.rag.retriever")
+        if retriever is not None:
+            retriever.on_corpus_swap(lambda names: self.refork())
+
+        print(f"🍴 Forked {workers} inference workers "
+              f"({torch_threads} torch threads each).")
+
+    def _start_pool(self) -> ProcessPoolExecutor:
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=self._initargs,
+        )
+        # With "fork", the first job starts every worker: fork them now,
+        # before serving, instead of on the first request.
+        executor.submit(os.getpid).result()
+        return executor
+
+    @property
+    def broken(self) -> bool:
+        """True once a worker died; the pool then rejects all jobs."""
+        return bool(self.executor._broken)
+
+    def ensure_workers(self) -> None:
+        """Replaces a broken process pool with freshly forked workers."""
+        with self._pool_lock:
+            if self._closed or not self.broken:
+                return
+            print("⚠️ An inference worker died; forking new workers.")
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = self._start_pool()
+            self.restarts += 1
+
+    def refork(self) -> None:
+        """
+        Replaces the workers with new ones forked from the parent as it is
+        now (e.g. after a corpus swap). Jobs already running finish on the
+        old workers, which then exit.
+        """
+        with self._pool_lock:
+            if self._closed:
+                return
+            gc.collect()
+            gc.freeze()
+            previous = self.executor
+            self.executor = self._start_pool()
+            self.reforks += 1
+        previous.shutdown(wait=False)
+        print(f"🍴 Forked {self.workers} new inference workers.")
+
+    def _respawn_in_background(self) -> None:
+        with self._pool_lock:
+            if self._closed or self._respawning:
+                return
+            self._respawning = True
+        threading.Thread(
+            target=self._respawn, name="prefork-respawn", daemon=True
+        ).start()
+
+    def _respawn(self) -> None:
+        try:
+            self.ensure_workers()
+        except Exception as e:
+            print(f"❌ Could not fork new inference workers: {e!r}")
+        finally:
+            self._respawning = False
+
+    def _check_pool(self, future: Future) -> None:
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._respawn_in_background()
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        """
+        Raises:
+            BrokenProcessPool: While the workers are being replaced.
+        """
+        executor = self.executor
+        if executor._broken:
+            self._respawn_in_background()
+            raise BrokenProcessPool("Inference workers are restarting")
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            raise
+        except RuntimeError:
+            # Shut down by refork() meanwhile: use the new workers.
+            future = self.executor.submit(fn, *args, **kwargs)
+        # A job failing on a dead worker starts the respawn right away.
+        future.add_done_callback(self._check_pool)
+        return future
+
+    def open_stream(self, emit: Callable[[Optional[Dict]], None]) -> int:
+        """Registers a consumer; returns the id to pass to the worker."""
+        with self._lock:
+            stream_id = next(self._stream_ids)
+            self._streams[stream_id] = emit
+        return stream_id
+
+    def close_stream(self, stream_id: int) -> bool:
+        """Unregisters a consumer; False if the stream had already ended."""
+        with self._lock:
+            return self._streams.pop(stream_id, None) is not None
+
+    def _dispatch(self) -> None:
+        while True:
+            item = self.events.get()
+            if item is None:
+                return
+            stream_id, event = item
+            with self._lock:
+                emit = self._streams.get(stream_id)
+                if event is None:
+                    # End of stream
+                    self._streams.pop(stream_id, None)
+            if emit is not None:
+                emit(event)
+
+    def pids(self) -> List[int]:
+        return sorted(self.executor._processes)
+
+    def memory(self) -> Dict[str, Dict[str, int]]:
+        """Per-process memory (Linux), to verify the weights are shared."""
+        return {
+            "parent": _memory_kb(os.getpid()),
+            **{f"worker_{pid}": _memory_kb(pid) for pid in self.pids()},
+        }
+
+    def shutdown(self, wait: bool = False, *, cancel_futures: bool = True) -> None:
+        with self._pool_lock:
+            if self._closed:
+                return
+            self._closed = True
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+        self.events.put(None)
+        gc.unfreeze()
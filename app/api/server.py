@@ -0,0 +1,406 @@
+"""
+Inference API
+-------------
+Standalone HTTP service around the LangGraph agent.
+
+Endpoints:
+- POST /v1/query         -> Runs the agent and returns the final answer.
+- POST /v1/query/stream  -> Same, but streams node events as NDJSON.
+- GET  /healthz          -> Liveness (process is up).
+- GET  /readyz           -> Readiness (models loaded, corpus ingested),
+                            pool and encoder batching stats.
+
+Profiling: send `X-Profile: cprofile|stack|torch` (or `?profile=...`) to
+profile one request; see app/evaluation/profiling.py for sampled profiling.
+
+Requests are admitted through a bounded InferencePool:
+- 429 when every worker and queue slot is busy (client should back off).
+- 503 while the service is starting up or shutting down.
+
+Workers are threads by default. With API_WORKER_MODE=process the models
+are loaded once and API_WORKERS processes are forked from the loaded
+parent, sharing the weights copy-on-write (see app/api/prefork.py).
+
+Run with:
+    uvicorn app.api.server:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import json
+import os
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.api.worker_pool import InferencePool, PoolClosedError, QueueFullError
+from app.rag.batcher import batcher_stats
+from app.utils.deadline import new_deadline
+
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+API_QUEUE_SIZE = int(os.getenv("API_QUEUE_SIZE", "8"))
+API_WARM_UP = os.getenv("API_WARM_UP", "true").lower() == "true"
+API_WORKER_MODE = os.getenv("API_WORKER_MODE", "thread").lower()
+API_TORCH_THREADS = int(os.getenv("API_TORCH_THREADS", "0"))
+
+if API_WORKER_MODE not in ("thread", "process"):
+    raise ValueError(
+        f"API_WORKER_MODE must be 'thread' or 'process', got {API_WORKER_MODE!r}"
+    )
+
+
+# -----------------------------
+# Schemas
+# -----------------------------
+class QueryRequest(BaseModel):
+    query: str
+    # Seconds; default REQUEST_TIMEOUT. Must be positive: 0 would mean
+    # "no deadline" to new_deadline().
+    timeout: Optional[float] = Field(None, gt=0)
+
+
+class ContextDocument(BaseModel):
+    page_content: str
+    metadata: Dict[str, Any] = {}
+
+
+class QueryResponse(BaseModel):
+    answer: Optional[str] = None
+    source: Optional[str] = None
+    route: Optional[str] = None
+    context: List[ContextDocument] = []
+    profile: Optional[str] = None  # Path prefix of the profile, if profiled
+    degraded: List[str] = []       # Degraded paths taken to meet the deadline
+    corpus_versions: Dict[str, Optional[str]] = {}  # Collection -> corpus version used
+
+
+# -----------------------------
+# Pipeline helpers
+# -----------------------------
+def _load_pipeline() -> None:
+    """
+    Heavy, blocking startup work. Runs once per process in a thread so the
+    liveness probe answers while models load. A warm-up query follows in
+    the background.
+    """
+    from app.startup import initialize
+
+    initialize(warm_up=API_WARM_UP)
+
+
+def _load_prefork_workers():
+    """
+    Process mode: loads the pipeline in this (parent) process without
+    running any query, then forks the workers from it.
+    """
+    from app.api.prefork import PreforkWorkers
+    from app.startup import initialize
+
+    initialize(warm_up=False)
+    return PreforkWorkers(
+        API_WORKERS, torch_threads=API_TORCH_THREADS, warm_up=API_WARM_UP
+    )
+
+
+def _initial_state(
+    query: str, deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    return {
+        "query": query,
+        "answer": None,
+        "source": None,
+        "context": None,
+        "deadline": deadline,
+        "degraded": [],
+    }
+
+
+def _serialize_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "answer": state.get("answer"),
+        "source": state.get("source"),
+        "route": state.get("route"),
+        "degraded": state.get("degraded") or [],
+        "corpus_versions": state.get("corpus_versions") or {},
+        "context": [
+            {"page_content": doc.page_content, "metadata": doc.metadata}
+            for doc in (state.get("context") or [])
+        ],
+    }
+
+
+def _trace(state: Dict[str, Any]) -> None:
+    from app.evaluation.langsmith_eval import trace_agent_response
+
+    trace_agent_response(state)
+
+
+def _invoke_graph(
+    query: str,
+    profile: Optional[str] = None,
+    deadline: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Args:
+        query (str): User query.
+        profile (str): Profiler requested for this call (None = sampling).
+        deadline (float): Epoch time by which the answer is due.
+    """
+    from app.evaluation.profiling import choose_mode, profiled
+    from app.graph.graph import get_agent_graph
+
+    with profiled(choose_mode(profile), name="query") as profile_path:
+        result_state = get_agent_graph().invoke(_initial_state(query, deadline))
+
+    _trace(result_state)
+    return {**_serialize_state(result_state), "profile": profile_path}
+
+
+def _stream_graph(
+    query: str,
+    emit: Callable[[Optional[Dict]], None],
+    profile: Optional[str] = None,
+    deadline: Optional[float] = None,
+) -> None:
+    """
+    Runs the graph node by node and pushes one event per node update.
+    Always finishes with `None` so the consumer knows the stream ended.
+    """
+    from app.evaluation.profiling import choose_mode, profiled
+    from app.graph.graph import get_agent_graph
+
+    try:
+        final_state = None
+        with profiled(choose_mode(profile), name="stream") as profile_path:
+            for update in get_agent_graph().stream(
+                _initial_state(query, deadline), stream_mode="updates"
+            ):
+                for node, node_state in update.items():
+                    if node == "decision":
+                        emit({"event": "route", "route": node_state.get("route")})
+                    else:
+                        final_state = node_state
+                        emit({"event": "answer", **_serialize_state(node_state)})
+
+        if final_state is not None:
+            _trace(final_state)
+        emit({"event": "done", "profile": profile_path})
+    except Exception as e:
+        emit({"event": "error", "detail": str(e)})
+    finally:
+        emit(None)
+
+
+# -----------------------------
+# App
+# -----------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.startup_error = None
+    app.state.prefork = None
+
+    if API_WORKER_MODE == "process":
+        # The pool needs the forked workers, which need the loaded models.
+        app.state.pool = None
+        load = _load_prefork_workers
+    else:
+        app.state.pool = InferencePool(
+            workers=API_WORKERS, queue_size=API_QUEUE_SIZE
+        )
+        load = _load_pipeline
+
+    def _on_loaded(task: "asyncio.Task") -> None:
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            app.state.startup_error = repr(error)
+            print(f"❌ Inference service failed to start: {error!r}")
+        else:
+            if API_WORKER_MODE == "process":
+                app.state.prefork = task.result()
+                app.state.pool = InferencePool(
+                    workers=API_WORKERS,
+                    queue_size=API_QUEUE_SIZE,
+                    executor=app.state.prefork,
+                )
+            app.state.ready = True
+            print("✅ Inference service ready.")
+
+    loader = asyncio.create_task(asyncio.to_thread(load))
+    loader.add_done_callback(_on_loaded)
+
+    yield
+
+    loader.cancel()
+    if app.state.pool is not None:
+        app.state.pool.shutdown(wait=False)
+    if app.state.prefork is not None:
+        app.state.prefork.shutdown()
+
+
+app = FastAPI(title="Agentic RAG Inference API", lifespan=lifespan)
+
+
+def _submit(fn: Callable, *args: Any) -> "asyncio.Future":
+    """Admits a job or maps the rejection to an HTTP error."""
+    if not app.state.ready:
+        raise HTTPException(status_code=503, detail="Service is not ready")
+
+    try:
+        return app.state.pool.submit(fn, *args)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=429, detail=str(e), headers={"Retry-After": "1"}
+        )
+    except PoolClosedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except BrokenProcessPool as e:
+        # Process mode: new workers are being forked.
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "1"}
+        )
+
+
+def _end_stream_on_failure(
+    future: "asyncio.Future", prefork, stream_id: int, emit: Callable
+) -> None:
+    """
+    Ends a worker stream whose job never finished it: the worker died,
+    failed before streaming, or the job was cancelled at shutdown.
+    """
+
+    def on_done(future: "asyncio.Future") -> None:
+        if future.cancelled():
+            detail = "Request cancelled"
+        elif future.exception() is not None:
+            detail = str(future.exception()) or repr(future.exception())
+        else:
+            return
+        if prefork.close_stream(stream_id):
+            emit({"event": "error", "detail": detail})
+            emit(None)
+
+    future.add_done_callback(on_done)
+
+
+def _requested_profile(
+    header: Optional[str], flag: Optional[str]
+) -> Optional[str]:
+    """Validates a per-request profiling switch (header wins over flag)."""
+    from app.evaluation import profiling
+
+    requested = header or flag
+    if not requested:
+        return None
+    if not profiling.PROFILE_ALLOW_REQUESTS:
+        raise HTTPException(
+            status_code=403, detail="Per-request profiling is disabled"
+        )
+    try:
+        return profiling.validate_mode(requested)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/healthz")
+async def healthz() -> Dict[str, Any]:
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz() -> Dict[str, Any]:
+    if not app.state.ready:
+        raise HTTPException(
+            status_code=503,
+            detail=app.state.startup_error or "Loading models",
+        )
+    status = {"status": "ready", "pool": app.state.pool.stats()}
+    prefork = app.state.prefork
+    if prefork is not None:
+        # A dead worker breaks the process pool: fork new workers, and
+        # report not ready if that fails.
+        try:
+            await asyncio.to_thread(prefork.ensure_workers)
+        except Exception as e:
+            raise HTTPException(
+                status_code=503, detail=f"Inference workers are down: {e!r}"
+            )
+        status["worker_restarts"] = prefork.restarts
+        status["worker_reforks"] = prefork.reforks
+        status["memory"] = prefork.memory()
+    else:
+        # Batchers run where the models run (per worker in process mode).
+        status["encoders"] = batcher_stats()
+    return status
+
+
+@app.post("/v1/query", response_model=QueryResponse)
+async def query(
+    request: QueryRequest,
+    profile: Optional[str] = None,
+    x_profile: Optional[str] = Header(None),
+) -> Dict[str, Any]:
+    from app.evaluation.profiling import ProfilerBusyError
+
+    mode = _requested_profile(x_profile, profile)
+    # The deadline starts at admission, so queueing time counts against it.
+    deadline = new_deadline(request.timeout)
+    try:
+        return await _submit(_invoke_graph, request.query, mode, deadline)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except BrokenProcessPool as e:
+        # The worker died mid-request; new workers are being forked.
+        raise HTTPException(
+            status_code=503, detail=f"Inference worker died: {e}",
+            headers={"Retry-After": "1"},
+        )
+
+
+@app.post("/v1/query/stream")
+async def query_stream(
+    request: QueryRequest,
+    profile: Optional[str] = None,
+    x_profile: Optional[str] = Header(None),
+) -> StreamingResponse:
+    mode = _requested_profile(x_profile, profile)
+    deadline = new_deadline(request.timeout)
+    loop = asyncio.get_running_loop()
+    events: "asyncio.Queue[Optional[Dict]]" = asyncio.Queue()
+
+    def emit(event: Optional[Dict]) -> None:
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    # Admission happens here, before the response starts,
+    # so a full queue still surfaces as a proper 429.
+    prefork = app.state.prefork
+    if prefork is None:
+        _submit(_stream_graph, request.query, emit, mode, deadline)
+    else:
+        # `emit` cannot cross the process boundary: the worker publishes
+        # to the shared event queue and the parent routes by stream id.
+        from app.api.prefork import stream_in_worker
+
+        stream_id = prefork.open_stream(emit)
+        try:
+            future = _submit(
+                stream_in_worker, stream_id, request.query, mode, deadline
+            )
+        except HTTPException:
+            prefork.close_stream(stream_id)
+            raise
+        _end_stream_on_failure(future, prefork, stream_id, emit)
+
+    async def body():
+        while True:
+            event = await events.get()
+            if event is None:
+                break
+            yield json.dumps(event, default=str) + "\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
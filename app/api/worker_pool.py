@@ -0,0 +1,129 @@
+"""
+Inference Worker Pool
+---------------------
+Bounded admission control in front of the (blocking) agent graph.
+
+The pool owns a fixed number of worker threads that execute graph
+invocations, plus a bounded number of waiting slots. Once every worker is
+busy and every waiting slot is taken, new requests are rejected immediately
+instead of piling up, which keeps latency predictable under load.
+
+Workers are threads by default; pass a process executor (see
+app/api/prefork.py) to run requests in forked worker processes instead.
+"""
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class QueueFullError(Exception):
+    """Raised when all workers and waiting slots are occupied."""
+    pass
+
+
+class PoolClosedError(Exception):
+    """Raised when work is submitted to a pool that is shutting down."""
+    pass
+
+
+class InferencePool:
+    """
+    Runs blocking callables on a fixed set of worker threads.
+
+    Admission is decided synchronously at submit time, so callers can map
+    rejections straight to HTTP status codes. All bookkeeping happens on the
+    event loop thread, which means no locking is required.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        queue_size: int = 8,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        Args:
+            workers (int): Number of requests executed concurrently.
+            queue_size (int): Number of requests allowed to wait for a worker.
+            executor (Executor): Runs the jobs; must have `workers` workers.
+                Defaults to a thread pool owned by this InferencePool.
+        """
+        if workers < 1:
+            raise ValueError("workers must be >= 1")
+        if queue_size < 0:
+            raise ValueError("queue_size must be >= 0")
+
+        self.workers = workers
+        self.queue_size = queue_size
+
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="inference",
+        )
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._closed = False
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    def submit(self, fn: Callable, *args: Any) -> "asyncio.Future":
+        """
+        Schedules `fn(*args)` on a worker.
+        Must be called from the event loop thread. With a process executor,
+        `fn` and `args` must be picklable (module-level functions).
+
+        Raises:
+            PoolClosedError: If the pool is shutting down.
+            QueueFullError: If every worker and waiting slot is occupied.
+        """
+        if self._closed:
+            raise PoolClosedError("Inference pool is shutting down")
+
+        if self._in_flight >= self.capacity:
+            self._rejected += 1
+            raise QueueFullError(
+                f"Inference queue is full ({self._in_flight} in flight)"
+            )
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._executor, fn, *args)
+        except Exception:
+            # The executor refused the job (e.g. its workers are restarting)
+            self._failed += 1
+            raise
+        self._in_flight += 1
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """Submits `fn(*args)` and waits for its result."""
+        return await self.submit(fn, *args)
+
+    def _release(self, future) -> None:
+        self._in_flight -= 1
+        if future.cancelled() or future.exception() is not None:
+            self._failed += 1
+        else:
+            self._completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "queued": max(0, self._in_flight - self.workers),
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops accepting work and (optionally) waits for running jobs."""
+        self._closed = True
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,233 @@
+"""
+On-Demand Profiling
+-------------------
+Wraps a single graph invocation in a profiler and writes the results to
+PROFILE_DIR, so a latency regression can be located without a debugger.
+
+Modes:
+- cprofile  deterministic Python profile
+            -> <id>.prof (pstats; snakeviz / flameprof) + <id>.txt (top functions)
+- stack     low-overhead sampling of the request thread's Python stack
+            -> <id>.collapsed (flamegraph.pl / speedscope)
+- torch     torch.profiler over the model calls
+            -> <id>.txt (per-operator timings), <id>.collapsed (stacks),
+               <id>.trace.json (chrome://tracing / Perfetto)
+
+When a request is profiled:
+- On demand: the caller asks for a mode (the API's `X-Profile` header or
+  `?profile=` query flag), if PROFILE_ALLOW_REQUESTS is enabled (off by
+  default: profiles cost time and disk, so anonymous callers must not be
+  able to trigger them).
+- Sampled: a random PROFILE_SAMPLE_RATE share of all requests is profiled
+  with PROFILE_MODE, so profiling can stay on at a low rate. A sample rate
+  of 1 profiles the whole process.
+
+cprofile and torch profiles are process-wide: they record every request
+running in the process at the same time, not just the profiled one. They
+also cannot overlap (torch.profiler, and cProfile on Python 3.12+, which
+allows one sys.monitoring profiler per process). So only one profile of
+each of these modes runs at a time; another one is refused
+(ProfilerBusyError) or, when sampled, skipped. `stack` profiles only the
+request's own thread and can run concurrently.
+
+Requests that are not profiled only pay for one random() call.
+"""
+
+import cProfile
+import importlib.util
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+PROFILE_MODES = ("cprofile", "stack", "torch")
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+PROFILE_MODE = os.getenv("PROFILE_MODE", "stack").lower()
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_ALLOW_REQUESTS = os.getenv("PROFILE_ALLOW_REQUESTS", "false").lower() == "true"
+PROFILE_STACK_INTERVAL_MS = float(os.getenv("PROFILE_STACK_INTERVAL_MS", "5"))
+
+# Rows in the text reports.
+_REPORT_ROWS = 50
+
+# Held while a profile of a process-wide mode runs.
+_EXCLUSIVE_LOCKS = {"cprofile": threading.Lock(), "torch": threading.Lock()}
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a process-wide profile is requested while one runs."""
+    pass
+
+
+def validate_mode(mode: str) -> str:
+    """
+    Raises:
+        ValueError: If the mode is unknown or cannot run here.
+    """
+    mode = mode.lower()
+    if mode not in PROFILE_MODES:
+        raise ValueError(
+            f"Unknown profile mode {mode!r}; expected one of {PROFILE_MODES}"
+        )
+    if mode == "torch" and importlib.util.find_spec("torch") is None:
+        raise ValueError("Profile mode 'torch' needs torch, which is not installed")
+    return mode
+
+
+def choose_mode(requested: Optional[str] = None) -> Optional[str]:
+    """
+    The profiler to use for one request, or None to run it unprofiled.
+
+    Args:
+        requested (str): Mode explicitly asked for by the caller.
+    """
+    if requested:
+        return validate_mode(requested)
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        mode = validate_mode(PROFILE_MODE)
+        # Sampling is best effort: skip rather than wait for a profile.
+        lock = _EXCLUSIVE_LOCKS.get(mode)
+        if lock is not None and lock.locked():
+            return None
+        return mode
+    return None
+
+
+@contextmanager
+def profiled(mode: Optional[str], name: str = "request") -> Iterator[Optional[str]]:
+    """
+    Profiles the enclosed block with `mode` (no-op for None).
+    Yields the path prefix of the written files (None if not profiling).
+
+    Raises:
+        ProfilerBusyError: If a profile of the same process-wide mode
+            (cprofile, torch) is already running in this process.
+    """
+    if mode is None:
+        yield None
+        return
+
+    mode = validate_mode(mode)
+    lock = _EXCLUSIVE_LOCKS.get(mode)
+    if lock is not None and not lock.acquire(blocking=False):
+        raise ProfilerBusyError(f"Another {mode} profile is running; retry later")
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        prefix = os.path.join(
+            PROFILE_DIR,
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{mode}-{uuid.uuid4().hex[:8]}",
+        )
+        profiler = {
+            "cprofile": _cprofile,
+            "stack": _stack_sampler,
+            "torch": _torch_profiler,
+        }[mode]
+
+        with profiler(prefix):
+            yield prefix
+    finally:
+        if lock is not None:
+            lock.release()
+
+    print(f"🔬 Profile written to {prefix}.*")
+
+
+# -----------------------------
+# Profilers
+# -----------------------------
+@contextmanager
+def _cprofile(prefix: str) -> Iterator[None]:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(prefix + ".prof")
+        with open(prefix + ".txt", "w") as f:
+            stats = pstats.Stats(profiler, stream=f)
+            stats.sort_stats("cumulative").print_stats(_REPORT_ROWS)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples the Python stack of one thread at a fixed interval and counts
+    identical stacks (the "collapsed" flame graph format).
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def _stack_sampler(prefix: str) -> Iterator[None]:
+    sampler = StackSampler(
+        threading.get_ident(), PROFILE_STACK_INTERVAL_MS / 1000
+    )
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        sampler.write_collapsed(prefix + ".collapsed")
+
+
+@contextmanager
+def _torch_profiler(prefix: str) -> Iterator[None]:
+    import torch
+    from torch.profiler import ProfilerActivity, profile
+
+    activities = [ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(ProfilerActivity.CUDA)
+
+    with profile(activities=activities, record_shapes=True, with_stack=True) as prof:
+        yield
+
+    prof.export_chrome_trace(prefix + ".trace.json")
+    prof.export_stacks(prefix + ".collapsed", "self_cpu_time_total")
+    with open(prefix + ".txt", "w") as f:
+        f.write(prof.key_averages().table(
+            sort_by="self_cpu_time_total", row_limit=_REPORT_ROWS
+        ))
@@ -0,0 +1,280 @@
+"""
+Retrieval Parameter Sweep
+-------------------------
+Measures retrieval quality against cost over a grid of settings, so
+retrieval parameters are picked from data instead of guesses.
+
+Swept parameters:
+- chunk_size / chunk_overlap  (re-chunks, re-embeds into in-memory Qdrant)
+- dense_k, bm25_k             (candidates per retriever)
+- pool_size                   (merged candidates passed to the reranker)
+- final_k                     (chunks returned to the LLM)
+- rerank_chars                (reranker input truncation)
+- neighbour_tokens            (neighbouring chunks added to the top hits;
+                               only with chunk_overlap 0)
+
+Reported per configuration: index size in chunks, recall@final_k, MRR,
+p50/p95 retrieval latency (embedding + search + rerank) and mean context
+tokens, measured on the passages the LLM would see; the Pareto-optimal
+configurations (quality vs. latency & tokens) are flagged.
+
+Labeled set (JSONL), one question per line:
+    {"question": "...", "relevant": ["short snippet copied from the source", ...]}
+
+A chunk counts as relevant if it contains one of the snippets (case- and
+whitespace-insensitive). Snippets, unlike chunk IDs, stay valid across
+chunk sizes, so keep them short enough not to straddle chunk boundaries.
+
+Usage:
+    python -m app.evaluation.retrieval_sweep --labels data/eval/retrieval.jsonl \\
+        [--grid grid.json] [--source data/Ebook-Agentic-AI.pdf] [--out sweep.json]
+
+Note: dense search runs against in-memory Qdrant, so absolute latencies
+exclude the network round trip to a remote Qdrant cluster.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import time
+from typing import Dict, Iterator, List, Sequence, Set
+
+DEFAULT_GRID = {
+    "chunk_size": [1000],
+    "chunk_overlap": [300, 0],
+    "dense_k": [5, 10, 15],
+    "bm25_k": [5, 15],
+    "pool_size": [8, 16],
+    "final_k": [3, 5, 8],
+    "rerank_chars": [300, 500],
+    "neighbour_tokens": [512],
+}
+
+CHUNK_PARAMS = ("chunk_size", "chunk_overlap")
+RETRIEVAL_PARAMS = (
+    "dense_k", "bm25_k", "pool_size", "final_k", "rerank_chars", "neighbour_tokens"
+)
+
+# (metric, higher_is_better) used for the Pareto frontier
+OBJECTIVES = (
+    ("recall", True),
+    ("mrr", True),
+    ("p95_ms", False),
+    ("context_tokens", False),
+)
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+def load_labels(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def match_snippets(texts: Sequence[str], snippets: Sequence[str]) -> List[Set[int]]:
+    """
+    For each retrieved text, the indices of the labeled snippets it contains.
+    """
+    normalized = [_normalize(s) for s in snippets]
+    matches = []
+    for text in texts:
+        text = _normalize(text)
+        matches.append({i for i, s in enumerate(normalized) if s in text})
+    return matches
+
+
+def score_question(matches: List[Set[int]], n_relevant: int) -> Dict[str, float]:
+    """
+    recall: share of labeled snippets found anywhere in the results.
+    rr:     reciprocal rank of the first relevant result (0 if none).
+    """
+    found = set().union(*matches) if matches else set()
+    first = next((rank for rank, m in enumerate(matches, 1) if m), None)
+    return {
+        "recall": len(found) / n_relevant if n_relevant else 0.0,
+        "rr": 1.0 / first if first else 0.0,
+    }
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def pareto_frontier(rows: List[Dict]) -> List[bool]:
+    """
+    Flags rows not dominated by any other row on OBJECTIVES.
+    """
+    def dominates(a: Dict, b: Dict) -> bool:
+        better_or_equal = all(
+            (a[m] >= b[m]) if up else (a[m] <= b[m]) for m, up in OBJECTIVES
+        )
+        strictly_better = any(
+            (a[m] > b[m]) if up else (a[m] < b[m]) for m, up in OBJECTIVES
+        )
+        return better_or_equal and strictly_better
+
+    return [
+        not any(dominates(other, row) for other in rows if other is not row)
+        for row in rows
+    ]
+
+
+def expand_grid(grid: Dict[str, List], keys: Sequence[str]) -> Iterator[Dict]:
+    for values in itertools.product(*(grid[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+# -----------------------------
+# Sweep
+# -----------------------------
+def build_registry(pages: List, chunk_size: int, chunk_overlap: int, source: str):
+    """
+    Chunks the corpus with the given settings and indexes it in memory
+    (chunk store + BM25 + in-memory Qdrant) as a single collection.
+    """
+    from langchain_qdrant import QdrantVectorStore
+    from app.rag.chunk_store import ChunkStore
+    from app.rag.collection_registry import CollectionConfig, CollectionRegistry
+    from app.rag.embeddings import get_embeddings
+    from app.rag.loader import split_documents
+    from app.rag.retriever import BM25Index, KnowledgeBase
+
+    store = ChunkStore.from_documents(
+        split_documents(pages, chunk_size, chunk_overlap)
+    )
+    name = f"sweep_{chunk_size}_{chunk_overlap}"
+    vector_store = QdrantVectorStore.from_documents(
+        store.documents(range(len(store))),
+        embedding=get_embeddings(),
+        collection_name=name,
+        location=":memory:",
+    )
+    config = CollectionConfig(
+        name=name, qdrant_collection=name, source_path=source, timeout=60.0
+    )
+    knowledge_base = KnowledgeBase(config, store, BM25Index(store), vector_store)
+    return CollectionRegistry({name: config}, lambda _: knowledge_base)
+
+
+def evaluate(retriever, labels: List[Dict]) -> Dict[str, float]:
+    """Runs every labeled question once and aggregates the metrics."""
+    # Warm-up (model kernels, caches) so it does not skew the latencies.
+    retriever.search(labels[0]["question"])
+
+    recalls, rrs, latencies, tokens = [], [], [], []
+    for label in labels:
+        start = time.perf_counter()
+        hits = retriever.search(label["question"])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        # Scored on the passages (hits plus neighbours) the LLM would see.
+        passages = retriever.passages(hits)
+        matches = match_snippets(
+            [" ".join(map(retriever.text, p)) for p in passages],
+            label["relevant"],
+        )
+        scores = score_question(matches, len(label["relevant"]))
+        recalls.append(scores["recall"])
+        rrs.append(scores["rr"])
+        tokens.append(sum(retriever.n_tokens(c) for p in passages for c in p))
+
+    n = len(labels)
+    return {
+        "recall": sum(recalls) / n,
+        "mrr": sum(rrs) / n,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "context_tokens": sum(tokens) / n,
+    }
+
+
+def run_sweep(labels: List[Dict], grid: Dict[str, List], source: str) -> List[Dict]:
+    from app.rag.loader import load_pdf
+    from app.rag.retriever import HybridRetriever
+
+    pages = load_pdf(source)
+    rows = []
+
+    for chunk_params in expand_grid(grid, CHUNK_PARAMS):
+        print(f"📐 Indexing with {chunk_params}...")
+        registry = build_registry(pages, source=source, **chunk_params)
+        # Index size: drives embedding time, vector storage and BM25 size.
+        chunks = len(registry.get(registry.names()[0]).store)
+
+        for params in expand_grid(grid, RETRIEVAL_PARAMS):
+            retriever = HybridRetriever(registry=registry, **params)
+            metrics = evaluate(retriever, labels)
+            rows.append({**chunk_params, "chunks": chunks, **params, **metrics})
+            print(f"   {params} -> recall={metrics['recall']:.3f} "
+                  f"p95={metrics['p95_ms']:.0f}ms")
+
+    for row, optimal in zip(rows, pareto_frontier(rows)):
+        row["pareto"] = optimal
+
+    return rows
+
+
+def format_table(rows: List[Dict]) -> str:
+    columns = CHUNK_PARAMS + ("chunks",) + RETRIEVAL_PARAMS
+    header = list(columns) + [
+        "recall@k", "MRR", "p50 ms", "p95 ms", "ctx tokens", "pareto"
+    ]
+    lines = [
+        "| " + " | ".join(header) + " |",
+        "|" + "---|" * len(header),
+    ]
+    ordered = sorted(rows, key=lambda r: (-r["recall"], -r["mrr"], r["p95_ms"]))
+    for row in ordered:
+        cells = [str(row[c]) for c in columns] + [
+            f"{row['recall']:.3f}",
+            f"{row['mrr']:.3f}",
+            f"{row['p50_ms']:.0f}",
+            f"{row['p95_ms']:.0f}",
+            f"{row['context_tokens']:.0f}",
+            "★" if row["pareto"] else "",
+        ]
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    from app.rag.collection_registry import PDF_PATH
+
+    parser = argparse.ArgumentParser(description="Retrieval parameter sweep")
+    parser.add_argument("--labels", required=True, help="Labeled JSONL set")
+    parser.add_argument("--grid", help="JSON file overriding DEFAULT_GRID keys")
+    parser.add_argument("--source", default=PDF_PATH, help="Source PDF")
+    parser.add_argument("--out", help="Write all rows as JSON here")
+    args = parser.parse_args()
+
+    grid = dict(DEFAULT_GRID)
+    if args.grid:
+        with open(args.grid) as f:
+            grid.update(json.load(f))
+
+    labels = load_labels(args.labels)
+    if not labels:
+        raise SystemExit("Labeled set is empty")
+
+    rows = run_sweep(labels, grid, args.source)
+    print()
+    print(format_table(rows))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
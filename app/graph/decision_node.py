@@ -4,12 +4,27 @@ Decision Node (LLM-Based)
 Routes queries to specialized tools using an LLM classifier.
 """
 
+import os
+import re
 from typing import Dict
-from langchain_core.prompts import PromptTemplate
-from app.llm.llm_client import get_llm
+from app.llm.llm_client import GenerationPolicy, generate
+from app.utils.deadline import degrade, time_left
 
-ROUTER_PROMPT = PromptTemplate(
-    template="""<|im_start|>system
+# The answer is a single word; a few tokens is plenty.
+ROUTER_POLICY = GenerationPolicy(
+    max_new_tokens=int(os.getenv("LLM_ROUTER_MAX_TOKENS", "4")),
+    max_time=float(os.getenv("LLM_ROUTER_MAX_TIME", "10")),
+)
+
+# With less time than this left before the deadline, route by keywords.
+ROUTER_MIN_TIME = float(os.getenv("LLM_ROUTER_MIN_TIME", "1"))
+WEATHER_KEYWORDS = re.compile(
+    r"\b(weather|temperature|forecast|rain|humidity)\b", re.IGNORECASE
+)
+
+# Plain format string (same `.format(query=...)` API as a PromptTemplate)
+# so importing the node does not pull in LangChain's tracing stack.
+ROUTER_PROMPT = """<|im_start|>system
 You are an intelligent query router. Your job is to classify the user's intent into exactly one of two categories: "weather" or "rag".
 
 Categories:
@@ -22,16 +37,21 @@ Output ONLY one word: "weather" or "rag".
 Query: {query}
 <|im_end|>
 <|im_start|>assistant
-""",
-    input_variables=["query"]
-)
+"""
 
 def decision_node(state: Dict) -> Dict:
     query = state.get("query", "")
-    llm = get_llm()
-    
+
+    left = time_left(state.get("deadline"))
+    if left is not None and left < ROUTER_MIN_TIME:
+        degrade(state, "router_keyword")
+        route = "weather" if WEATHER_KEYWORDS.search(query) else "rag"
+        return {**state, "route": route}
+
     # Run the classification
-    response = llm.invoke(ROUTER_PROMPT.format(query=query))
+    response = generate(
+        ROUTER_PROMPT.format(query=query), ROUTER_POLICY, max_time=left
+    )
     
     # Normalize and clean the output
     route_raw = response.strip().lower()
@@ -9,10 +9,13 @@ User Query
 Decision Node
    ├── Weather Node → Final Answer
    └── RAG Node     → Final Answer
+
+The compiled graph is built on first use (`get_agent_graph()`), so importing
+this module does not pull in LangGraph or any model dependencies.
+`agent_graph` is still available as a lazily-resolved module attribute.
 """
 
-from typing import TypedDict, Optional, List
-from langgraph.graph import StateGraph, END
+from typing import TypedDict, Dict, Optional, List
 from langchain_core.documents import Document
 
 from app.graph.decision_node import decision_node
@@ -26,9 +29,14 @@ class AgentState(TypedDict):
     answer: Optional[str]
     source: Optional[str]
     context: Optional[List[Document]]
+    deadline: Optional[float]         # Epoch seconds (app/utils/deadline.py)
+    degraded: Optional[List[str]]     # Degraded paths taken for this request
+    corpus_versions: Optional[Dict[str, Optional[str]]]  # Collection -> corpus version
 
 
 def build_graph():
+    from langgraph.graph import StateGraph, END
+
     graph = StateGraph(AgentState)
 
     graph.add_node("decision", decision_node)
@@ -53,4 +61,23 @@ def build_graph():
     return graph.compile()
 
 
-agent_graph = build_graph()
+_AGENT_GRAPH = None
+
+
+def get_agent_graph():
+    """
+    Builds (once) and returns the compiled agent graph.
+    """
+    global _AGENT_GRAPH
+
+    if _AGENT_GRAPH is None:
+        _AGENT_GRAPH = build_graph()
+
+    return _AGENT_GRAPH
+
+
+def __getattr__(name):
+    # Keeps `from app.graph.graph import agent_graph` working (PEP 562).
+    if name == "agent_graph":
+        return get_agent_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
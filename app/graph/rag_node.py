@@ -3,33 +3,53 @@ RAG Node
 --------
 """
 
-import re
+import os
 from typing import Dict, List
-from langchain_core.prompts import PromptTemplate
-from app.llm.llm_client import get_llm
+from app.llm.llm_client import GenerationPolicy, generate
 from app.rag.retriever import HybridRetriever
+from app.utils.deadline import degrade, time_left
+
+# Retrieval settings. Pick them from measurements with
+# `python -m app.evaluation.retrieval_sweep` rather than by guessing.
+RAG_DENSE_K = int(os.getenv("RAG_DENSE_K", "15"))
+RAG_BM25_K = int(os.getenv("RAG_BM25_K", str(RAG_DENSE_K)))
+RAG_POOL_SIZE = int(os.getenv("RAG_POOL_SIZE", "8"))
+RAG_FINAL_K = int(os.getenv("RAG_FINAL_K", "8"))
+
+# With non-overlapping chunks (CHUNK_OVERLAP=0), the RAG_EXPAND_TOP best
+# hits are extended with neighbouring chunks worth up to
+# RAG_NEIGHBOUR_TOKENS prompt tokens in total.
+RAG_NEIGHBOUR_TOKENS = int(os.getenv("RAG_NEIGHBOUR_TOKENS", "512"))
+RAG_EXPAND_TOP = int(os.getenv("RAG_EXPAND_TOP", "3"))
+
+NO_ANSWER = "The document does not provide a clear answer."
+
+# Generation stops at the end of the turn, right after the canned
+# "no answer" sentence, or at the time limit (partial answer returned).
+RAG_POLICY = GenerationPolicy(
+    max_new_tokens=int(os.getenv("LLM_RAG_MAX_TOKENS", "256")),
+    stop_phrases=(NO_ANSWER,),
+    max_time=float(os.getenv("LLM_RAG_MAX_TIME", "60")),
+)
+
+# Under a request deadline, retrieval must finish this many seconds early
+# to leave time for generation; generation is skipped altogether (the top
+# passage is returned) when less than RAG_MIN_GENERATION_TIME is left.
+RAG_GENERATION_RESERVE = float(os.getenv("RAG_GENERATION_RESERVE", "5"))
+RAG_MIN_GENERATION_TIME = float(os.getenv("RAG_MIN_GENERATION_TIME", "1"))
 
 # -----------------------------
 # 1. Cleaner
 # -----------------------------
-def clean_chunk(text: str) -> str:
-    # Remove headers/footers
-    text = re.sub(r'\d+\s+AGENTIC AI FOR EXECUTIVES', '', text, flags=re.IGNORECASE)
-    lines = text.splitlines()
-    cleaned = []
-    for line in lines:
-        line = line.strip()
-        if len(line) < 5 or line.isdigit():
-            continue
-        cleaned.append(line)
-    return " ".join(cleaned)
+# Chunks are cleaned once at ingest time (app/rag/loader.py). `clean_chunk`
+# is re-exported here for callers that clean ad-hoc text.
+from app.rag.loader import clean_chunk  # noqa: E402,F401
 
 # -----------------------------
 # 2. Prompt Template
 # -----------------------------
-RAG_PROMPT = PromptTemplate(
-    input_variables=["context", "question"],
-    template="""<|im_start|>system
+# Plain format string: `.format(context=..., question=...)`.
+RAG_PROMPT = """<|im_start|>system
 You are a precise extraction assistant. 
 Your task is to answer the user's question using ONLY the text provided in the "Context" section below.
 
@@ -59,7 +79,24 @@ Question:
 <|im_end|>
 <|im_start|>assistant
 """
-)
+
+
+def passage_text(retriever: HybridRetriever, passage: List) -> str:
+    """
+    Cleaned text of one passage (consecutive chunks, see
+    HybridRetriever.passages).
+    """
+    # Precomputed at ingest time; no regex work per query.
+    return " ".join(filter(None, map(retriever.context_text, passage)))
+
+
+def build_context(retriever: HybridRetriever, passages: List[List]) -> str:
+    """
+    Joins the (precomputed, cleaned) context text of the retrieved passages.
+    """
+    return "\n\n".join(
+        filter(None, (passage_text(retriever, p) for p in passages))
+    )
 
 
 # -----------------------------
@@ -67,36 +104,50 @@ Question:
 # -----------------------------
 def rag_node(state: Dict) -> Dict:
     query = state.get("query", "").strip()
-    
-    # 1. Retrieval
-    retriever = HybridRetriever(dense_k=15, final_k=8)
-    retrieved_docs = retriever.retrieve(query)
-    
-    if not retrieved_docs:
-        state["answer"] = "The document does not provide a clear answer."
+    deadline = state.get("deadline")
+
+    # 1. Retrieval (chunk IDs into the shared chunk store)
+    retriever = HybridRetriever(
+        dense_k=RAG_DENSE_K,
+        final_k=RAG_FINAL_K,
+        bm25_k=RAG_BM25_K,
+        pool_size=RAG_POOL_SIZE,
+        neighbour_tokens=RAG_NEIGHBOUR_TOKENS,
+        expand_top=RAG_EXPAND_TOP,
+    )
+    hits = retriever.search(
+        query,
+        deadline=None if deadline is None else deadline - RAG_GENERATION_RESERVE,
+    )
+    for reason in retriever.degraded:
+        degrade(state, reason)
+    # Which corpus version answered (changes on hot reloads)
+    state["corpus_versions"] = retriever.versions
+
+    if not hits:
+        state["answer"] = NO_ANSWER
         state["source"] = "rag"  
         return state
 
-    # 2. Context Building
-    context_parts = []
-    for doc in retrieved_docs:
-        cleaned = clean_chunk(doc.page_content)
-        if cleaned:
-            context_parts.append(cleaned)
-    
-    context = "\n\n".join(context_parts)
-
-    # 3. Generation
-    llm = get_llm()
-    prompt = RAG_PROMPT.format(context=context, question=query)
-    
-    response = llm.invoke(prompt)
-    
-    # 4. Post-processing
-    if "<|im_start|>assistant" in response:
-        response = response.split("<|im_start|>assistant")[-1].strip()
+    # 2. Context Building (top hits plus neighbouring chunks)
+    passages = retriever.passages(hits)
+    context = build_context(retriever, passages)
+
+    # 3. Generation (bounded by RAG_POLICY and the deadline; output
+    # already trimmed)
+    left = time_left(deadline)
+    if left is not None and left < RAG_MIN_GENERATION_TIME:
+        degrade(state, "generation_skipped")
+        response = passage_text(retriever, passages[0])
+    else:
+        prompt = RAG_PROMPT.format(context=context, question=query)
+        response = generate(prompt, RAG_POLICY, max_time=left)
+        if left is not None and time_left(deadline) == 0:
+            degrade(state, "generation_cut")
 
     state["answer"] = response
     state["source"] = "rag"      
-    state["context"] = retrieved_docs
+    state["context"] = retriever.documents(
+        [chunk for passage in passages for chunk in passage]
+    )
     return state
\ No newline at end of file
@@ -3,9 +3,16 @@ Weather Node
 ------------
 """
 
+import os
 from typing import Dict
+import requests
 from langchain_core.documents import Document 
-from app.utils.weather_api import fetch_weather
+from app.utils.deadline import degrade, time_left
+from app.utils.weather_api import WeatherAPIError, fetch_weather
+
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", "10"))
+WEATHER_UNAVAILABLE = "The weather service did not respond in time."
+
 
 def weather_node(state: Dict) -> Dict:
     """
@@ -14,8 +21,19 @@ def weather_node(state: Dict) -> Dict:
     query = state.get("query", "")
     city = extract_city_from_query(query)
 
-    # 1. Fetch Data
-    weather = fetch_weather(city)
+    # 1. Fetch Data (bounded by the time left in the request)
+    left = time_left(state.get("deadline"))
+    if left == 0:
+        return _weather_unavailable(state)
+
+    timeout = WEATHER_TIMEOUT if left is None else min(WEATHER_TIMEOUT, left)
+    try:
+        weather = fetch_weather(city, timeout=timeout)
+    except WeatherAPIError as e:
+        # Running out of budget degrades; other API errors still surface.
+        if left is None or not isinstance(e.__cause__, requests.Timeout):
+            raise
+        return _weather_unavailable(state)
 
     # 2. Format Answer
     answer = (
@@ -45,6 +63,14 @@ def weather_node(state: Dict) -> Dict:
     return state
 
 
+def _weather_unavailable(state: Dict) -> Dict:
+    degrade(state, "weather_timeout")
+    state["answer"] = WEATHER_UNAVAILABLE
+    state["source"] = "weather_api"
+    state["context"] = []
+    return state
+
+
 def extract_city_from_query(query: str) -> str:
     """
     Naive city extraction from query.
@@ -4,23 +4,265 @@ LLM Client
 - Uses GPU automatically if available
 - Falls back to CPU if not
 - Supports gated Hugging Face models
+- torch / transformers are imported on first use, not at import time
+- Optional speculative (assisted) decoding, configured via LLM_SPECULATIVE:
+    none           plain greedy decoding (default)
+    prompt_lookup  draft tokens are n-grams copied from the prompt; ideal
+                   for RAG, where answers largely copy spans of the context
+    draft          draft tokens come from a small model of the same family
+                   (LLM_DRAFT_MODEL, default Qwen/Qwen2.5-0.5B-Instruct)
+  With greedy decoding the target model verifies every drafted token, so
+  the output is identical to plain greedy; only the speed changes.
+  Benchmark: python benchmarks/speculative_decoding.py
+- Per-call-site generation policies (`GenerationPolicy` + `generate()`):
+  max new tokens, stop phrases and a wall-clock limit after which the
+  partial output is returned. Generation always stops at chat-turn
+  markers (<|im_end|>), so no stray turns need stripping afterwards.
 """
 import os
-import torch
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
-from langchain_huggingface import HuggingFacePipeline
-from huggingface_hub import login
 
 load_dotenv()
 
 _LLM = None
+_TOKENIZER = None
+_EOS_IDS = None
+_DRAFT_MODEL = None
+
+SPECULATIVE_MODES = ("none", "prompt_lookup", "draft")
+
+# Chat-template markers: generation ends at the end of the turn and the
+# output is cut at any marker (they are never part of an answer).
+END_OF_TURN = "<|im_end|>"
+ASSISTANT_HEADER = "<|im_start|>assistant"
+STOP_MARKERS = (END_OF_TURN, "<|im_start|>")
+
+
+@dataclass(frozen=True)
+class GenerationPolicy:
+    """
+    Generation limits for one call site.
+
+    Args:
+        max_new_tokens (int): Hard cap on generated tokens
+        stop_phrases (tuple): Phrases that end generation; they are kept
+            in the output (e.g. a canned "no answer" sentence)
+        max_time (float): Wall-clock seconds before generation is cut
+            off and the partial output returned (None/0 = no limit)
+    """
+
+    max_new_tokens: int
+    stop_phrases: Tuple[str, ...] = ()
+    max_time: Optional[float] = None
+
+
+def get_model_name() -> str:
+    return os.getenv("HF_MODEL_NAME", "Qwen/Qwen2.5-3B-Instruct")
+
+
+def get_tokenizer():
+    """
+    Loads (once) only the tokenizer of the LLM, without model weights.
+    Used at ingest time to count prompt tokens per chunk.
+    """
+    global _TOKENIZER
+    if _TOKENIZER is not None:
+        return _TOKENIZER
+
+    from transformers import AutoTokenizer
+
+    _TOKENIZER = AutoTokenizer.from_pretrained(
+        get_model_name(), token=os.getenv("HF_TOKEN")
+    )
+    return _TOKENIZER
+
+
+def get_eos_ids() -> List[int]:
+    """
+    Token ids that end generation: EOS and the end-of-turn marker.
+    Computed once (the vocabulary is a large dict).
+    """
+    global _EOS_IDS
+    if _EOS_IDS is None:
+        tokenizer = get_tokenizer()
+        eos_ids = [tokenizer.eos_token_id]
+        if END_OF_TURN in tokenizer.get_vocab():
+            eos_ids.append(tokenizer.convert_tokens_to_ids(END_OF_TURN))
+        _EOS_IDS = sorted(set(eos_ids))
+    return _EOS_IDS
+
+
+def count_tokens(text: str) -> int:
+    return len(get_tokenizer().encode(text, add_special_tokens=False))
+
+
+def load_causal_lm(model_name: str):
+    """
+    Loads a causal LM on GPU (fp16) if available, else CPU (fp32).
+    """
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    use_gpu = torch.cuda.is_available()
+    return AutoModelForCausalLM.from_pretrained(
+        model_name,
+        torch_dtype=torch.float16 if use_gpu else torch.float32,
+        low_cpu_mem_usage=True,
+        device_map="cuda" if use_gpu else "cpu",
+    )
+
+
+def get_draft_model():
+    """
+    Loads (once) the small draft model used for assisted decoding.
+    It must share the target model's tokenizer (same model family).
+    """
+    global _DRAFT_MODEL
+    if _DRAFT_MODEL is None:
+        draft_name = os.getenv("LLM_DRAFT_MODEL", "Qwen/Qwen2.5-0.5B-Instruct")
+        print(f"🚀 Loading draft model {draft_name}...")
+        _DRAFT_MODEL = load_causal_lm(draft_name)
+    return _DRAFT_MODEL
+
+
+def get_decoding_kwargs(mode: str = None) -> dict:
+    """
+    Extra `generate()` kwargs for the configured speculative decoding mode.
+
+    Args:
+        mode (str): One of SPECULATIVE_MODES (default: LLM_SPECULATIVE)
+    """
+    mode = (mode or os.getenv("LLM_SPECULATIVE", "none")).lower()
+
+    if mode == "none":
+        return {}
+    if mode == "prompt_lookup":
+        return {
+            "prompt_lookup_num_tokens": int(
+                os.getenv("LLM_PROMPT_LOOKUP_TOKENS", "10")
+            )
+        }
+    if mode == "draft":
+        return {"assistant_model": get_draft_model()}
+
+    raise ValueError(
+        f"Unknown LLM_SPECULATIVE mode {mode!r}; expected one of {SPECULATIVE_MODES}"
+    )
+
+
+def truncate_at_stops(text: str, stop_phrases: Tuple[str, ...] = ()) -> str:
+    """
+    Cuts generated text at the first chat marker and right after the
+    first stop phrase.
+    """
+    # An echoed assistant header is not part of the answer.
+    text = text.strip()
+    if text.startswith(ASSISTANT_HEADER):
+        text = text[len(ASSISTANT_HEADER):]
+
+    for marker in STOP_MARKERS:
+        text = text.split(marker, 1)[0]
+
+    ends = [
+        text.find(phrase) + len(phrase)
+        for phrase in stop_phrases
+        if phrase in text
+    ]
+    if ends:
+        text = text[:min(ends)]
+
+    return text.strip()
+
+
+@lru_cache(maxsize=32)
+def _stop_window(stop_phrases: Tuple[str, ...]) -> int:
+    """Tokens to decode at each step to see any of the stop phrases."""
+    tokenizer = get_tokenizer()
+    return max(
+        len(tokenizer.encode(p, add_special_tokens=False)) for p in stop_phrases
+    ) + 2
+
+
+def _stopping_criteria(stop_phrases: Tuple[str, ...]):
+    """
+    Stops as soon as a stop phrase appears in the generated tokens.
+    Only the tail of the new tokens is decoded at each step.
+    """
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    tokenizer = get_tokenizer()
+    window = _stop_window(stop_phrases)
+
+    class StopOnPhrases(StoppingCriteria):
+        def __init__(self):
+            self.prompt_len = None
+
+        def __call__(self, input_ids, scores, **kwargs):
+            if self.prompt_len is None:
+                # First step: one new token after the prompt. (Assisted
+                # decoding may add several; a phrase starting in them is
+                # still cut afterwards by truncate_at_stops.)
+                self.prompt_len = input_ids.shape[-1] - 1
+            start = max(self.prompt_len, input_ids.shape[-1] - window)
+            tails = tokenizer.batch_decode(input_ids[:, start:])
+            return torch.tensor(
+                [any(p in tail for p in stop_phrases) for tail in tails],
+                dtype=torch.bool,
+                device=input_ids.device,
+            )
+
+    return StoppingCriteriaList([StopOnPhrases()])
+
+
+def generate(prompt: str, policy: GenerationPolicy,
+             max_time: Optional[float] = None) -> str:
+    """
+    Runs the LLM on a prompt under a generation policy.
+
+    Args:
+        prompt (str): Fully formatted chat prompt
+        policy (GenerationPolicy): Limits of the calling site
+        max_time (float): Optional tighter wall-clock limit for this call
+    """
+    pipeline_kwargs = {
+        "max_new_tokens": policy.max_new_tokens,
+        "eos_token_id": get_eos_ids(),
+    }
+
+    limits = [t for t in (policy.max_time, max_time) if t]
+    if limits:
+        pipeline_kwargs["max_time"] = min(limits)
+    if policy.stop_phrases:
+        pipeline_kwargs["stopping_criteria"] = _stopping_criteria(
+            policy.stop_phrases
+        )
+
+    start = time.perf_counter()
+    text = get_llm().invoke(prompt, pipeline_kwargs=pipeline_kwargs)
+
+    if limits and time.perf_counter() - start >= min(limits):
+        print(f"⏱️ Generation hit its {min(limits):.1f}s limit; returning partial output")
+
+    return truncate_at_stops(text, policy.stop_phrases)
+
 
 def get_llm():
     global _LLM
     if _LLM is not None:
         return _LLM
 
+    # Heavy imports are deferred until the model is actually needed,
+    # so importing this module (e.g. through the graph) stays cheap.
+    import torch
+    from transformers import pipeline
+    from langchain_huggingface import HuggingFacePipeline
+    from huggingface_hub import login
+
     hf_token = os.getenv("HF_TOKEN")
     if hf_token:
         login(token=hf_token)
@@ -31,28 +273,24 @@ def get_llm():
     
     print(f"🚀 Loading LLM on {device.upper()}...")
 
-    model_name = os.getenv("HF_MODEL_NAME", "Qwen/Qwen2.5-3B-Instruct")
+    model_name = get_model_name()
     
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer = get_tokenizer()
 
     # Load Model
-    model = AutoModelForCausalLM.from_pretrained(
-        model_name,
-        torch_dtype=torch.float16 if use_gpu else torch.float32,
-        low_cpu_mem_usage=True,
-        device_map=device 
-    )
+    model = load_causal_lm(model_name)
 
     # Pipeline
     text_generation_pipeline = pipeline(
         task="text-generation",
         model=model,
         tokenizer=tokenizer,
-        max_new_tokens=256,
+        max_new_tokens=256,     # Default; call sites pass their own policy
         do_sample=False,        # Greedy decoding (Strict facts)
         repetition_penalty=1.1, # Prevents looping
         return_full_text=False, # Don't return the prompt in the output
-        pad_token_id=tokenizer.eos_token_id
+        pad_token_id=tokenizer.eos_token_id,
+        **get_decoding_kwargs(), # Speculative decoding (output unchanged)
     )
 
     _LLM = HuggingFacePipeline(pipeline=text_generation_pipeline)
@@ -0,0 +1,269 @@
+"""
+Dynamic Batcher
+---------------
+Shares one encoder model between concurrent requests by batching their
+inputs: the query embedder and the cross-encoder are otherwise called once
+per request with tiny inputs (one query, ~8 rerank pairs), which wastes
+most of each forward pass.
+
+Callers block in `submit(items)`, at most until their deadline (a request
+that times out while still queued is dropped from its batch). A single
+worker thread per model takes the
+first waiting request, then keeps collecting requests for up to
+`max_wait_ms` (or until `max_batch_size` items), runs the model once over
+the combined batch and hands each caller its slice of the results.
+Requests that arrive while a batch is running are picked up by the next
+batch, so under load batches form even with `max_wait_ms=0`.
+
+The worker thread only holds a weak reference to its batcher: it exits
+once the batcher is closed (`close()`) or garbage collected, after
+finishing the requests already queued.
+
+Each batcher reports throughput and the distribution of queueing delay
+(time from submit to the start of the batch) via `stats()`;
+`batcher_stats()` collects them for the API's /readyz.
+"""
+
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FuturesTimeout
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from app.utils.deadline import time_left
+
+# Recent queueing delays kept for the percentiles.
+_DELAY_WINDOW = 2048
+
+ENCODER_MAX_WAIT_MS = float(os.getenv("ENCODER_MAX_WAIT_MS", "2"))
+
+_BATCHERS: "weakref.WeakValueDictionary[str, DynamicBatcher]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+class _Request(NamedTuple):
+    items: Sequence[Any]
+    future: Future
+    enqueued: float
+
+
+# Queued by close() (or when the batcher is collected): stops the worker.
+_STOP = None
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+class DynamicBatcher:
+    """
+    Runs `fn(items) -> results` (one result per item, same order) over
+    batches combined from concurrent `submit` calls.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[List[Any]], Sequence[Any]],
+        name: str,
+        max_batch_size: int = 32,
+        max_wait_ms: float = ENCODER_MAX_WAIT_MS,
+    ):
+        """
+        Args:
+            fn (Callable): Batch function, e.g. `model.embed_documents`.
+            name (str): Name in the stats.
+            max_batch_size (int): Items per batch; a batch closes early
+                once it holds this many (a single larger request still
+                runs as one batch).
+            max_wait_ms (float): How long to wait for more requests after
+                the first one (0 = only take requests already waiting).
+        """
+        self.fn = fn
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._init_state()
+        _BATCHERS[name] = self
+
+    def _init_state(self) -> None:
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        # Stops the worker on close() or garbage collection; holds only the
+        # queue, not the batcher.
+        if getattr(self, "_stop_worker", None) is not None:
+            self._stop_worker.detach()
+        self._stop_worker = weakref.finalize(self, self._queue.put, _STOP)
+        self._started = time.monotonic()
+        self._requests = 0
+        self._batches = 0
+        self._items = 0
+        self._busy = 0.0
+        self._delays_ms = deque(maxlen=_DELAY_WINDOW)
+
+    def submit(
+        self, items: Sequence[Any], deadline: Optional[float] = None
+    ) -> List[Any]:
+        """
+        Blocks until `items` were processed (as part of some batch) and
+        returns their results. Exceptions from the batch are re-raised.
+
+        Args:
+            items (Sequence): Inputs of this request.
+            deadline (float): Epoch time after which to stop waiting
+                (None = wait for the batch).
+
+        Raises:
+            concurrent.futures.TimeoutError: If the deadline passed first.
+        """
+        if not items:
+            return []
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"Batcher '{self.name}' is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=_serve,
+                    args=(weakref.ref(self), self._queue),
+                    name=f"batcher-{self.name}",
+                    daemon=True,
+                )
+                self._thread.start()
+
+            # Enqueued under the lock, so never behind close()'s stop marker.
+            future = Future()
+            self._queue.put(_Request(items, future, time.monotonic()))
+
+        try:
+            return future.result(timeout=time_left(deadline))
+        except FuturesTimeout:
+            # Still queued: drop it from its batch (no-op once running).
+            future.cancel()
+            raise
+
+    def close(self) -> None:
+        """Stops the worker once the requests already queued are done."""
+        with self._lock:
+            self._closed = True
+        self._stop_worker()
+
+    def _collect(self, first: _Request) -> bool:
+        """
+        Collects a batch starting with `first` and runs it.
+        Returns False if the batcher was closed meanwhile.
+        """
+        batch = [first]
+        size = len(first.items)
+        closes = time.monotonic() + self.max_wait
+        running = True
+
+        while size < self.max_batch_size:
+            wait = closes - time.monotonic()
+            try:
+                request = (
+                    self._queue.get(timeout=wait) if wait > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if request is _STOP:
+                running = False
+                break
+            batch.append(request)
+            size += len(request.items)
+
+        # Callers that timed out while queued cancelled their request.
+        batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+        if batch:
+            self._run_batch(batch)
+        return running
+
+    def _run_batch(self, batch: List[_Request]) -> None:
+        items = [item for request in batch for item in request.items]
+        start = time.monotonic()
+
+        try:
+            results = list(self.fn(items))
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"{self.name}: got {len(results)} results for {len(items)} items"
+                )
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+        finally:
+            with self._lock:
+                self._busy += time.monotonic() - start
+                self._batches += 1
+                self._requests += len(batch)
+                self._items += len(items)
+                self._delays_ms.extend(
+                    (start - request.enqueued) * 1000 for request in batch
+                )
+
+        offset = 0
+        for request in batch:
+            n = len(request.items)
+            request.future.set_result(results[offset:offset + n])
+            offset += n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            delays = sorted(self._delays_ms)
+            elapsed = time.monotonic() - self._started
+            return {
+                "requests": self._requests,
+                "batches": self._batches,
+                "items": self._items,
+                "mean_batch_items": self._items / self._batches if self._batches else 0.0,
+                "items_per_s": self._items / elapsed if elapsed else 0.0,
+                "busy_items_per_s": self._items / self._busy if self._busy else 0.0,
+                "queue_ms": {
+                    "p50": _percentile(delays, 50),
+                    "p95": _percentile(delays, 95),
+                    "p99": _percentile(delays, 99),
+                    "max": delays[-1] if delays else 0.0,
+                },
+            }
+
+
+def _serve(batcher_ref: "weakref.ref[DynamicBatcher]", requests: queue.Queue) -> None:
+    """
+    Worker thread loop. Holds the batcher only while a batch is being
+    collected and run, so an unused batcher can be garbage collected.
+    """
+    while True:
+        request = requests.get()
+        if request is _STOP:
+            return
+        batcher = batcher_ref()
+        if batcher is None:
+            return
+        if not batcher._collect(request):
+            return
+        del batcher
+
+
+def batcher_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every live batcher in this process, by name."""
+    return {name: batcher.stats() for name, batcher in list(_BATCHERS.items())}
+
+
+def _reset_after_fork() -> None:
+    # The worker threads do not survive fork; start fresh in the child.
+    for batcher in list(_BATCHERS.values()):
+        batcher._init_state()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,340 @@
+"""
+Chunk Store
+-----------
+Compact, shareable storage for the chunked corpus.
+
+Instead of keeping one LangChain `Document` (text + metadata dict) per chunk
+in every process, the corpus is stored column-wise:
+- Text fields: one contiguous UTF-8 buffer plus an int64 offset array.
+- Integer fields: flat typed arrays (e.g. the metadata-table index).
+- Metadata: a small table of *unique* metadata dicts. Chunks from the same
+  page share one entry instead of each owning a copy.
+- Derived fields precomputed at ingest (see loader.add_derived_fields) get
+  their own columns: cleaned context text, BM25 tokens, token count, and
+  the reranker input as an end offset into the text buffer (zero-copy).
+- Stores of non-overlapping chunks (see loader.link_neighbours) have two
+  more integer columns with the IDs of each chunk's neighbours.
+
+On disk, every buffer is a raw file that is opened with `mmap`, so several
+worker processes reading the same store share the same physical pages.
+Chunks are addressed by integer ID everywhere (BM25, dedup, context);
+`Document` objects are only built at the edges via `document()`.
+
+Layout of a store directory:
+    manifest.json       count, field names/types, metadata table
+    <field>.bin         UTF-8 text buffer of a text field
+    <field>.offsets     int64 offsets (count + 1) into <field>.bin
+    <field>.col         typed array of an integer field
+"""
+
+import array
+import json
+import mmap
+import os
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+
+_MANIFEST = "manifest.json"
+_FORMAT_VERSION = 2
+
+# Text fields every store has (variable-length UTF-8).
+TEXT_FIELDS = ("text", "context", "bm25_tokens")
+
+# Integer fields every store has, mapped to their `array` typecode.
+INT_FIELDS = {"meta_id": "i", "n_tokens": "i", "rerank_end": "q"}
+
+# Neighbour chunk IDs (-1 = none), only in stores of linked chunks.
+NEIGHBOUR_FIELDS = {"prev_id": "q", "next_id": "q"}
+
+
+def _pack_text(values: Iterable[str]):
+    """Concatenates strings into one UTF-8 buffer + int64 offsets."""
+    buffer = bytearray()
+    offsets = array.array("q", [0])
+    for value in values:
+        buffer += value.encode("utf-8")
+        offsets.append(len(buffer))
+    return bytes(buffer), offsets
+
+
+def _map_file(path: str):
+    """Read-only mmap of a file (empty files map to empty bytes)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class ChunkStore:
+    """
+    Read-mostly, column-oriented chunk storage addressed by integer ID.
+    """
+
+    __slots__ = ("_count", "_texts", "_ints", "_metadata")
+
+    def __init__(
+        self,
+        count: int,
+        texts: Dict[str, tuple],
+        ints: Dict[str, Sequence[int]],
+        metadata: List[dict],
+    ):
+        """
+        Args:
+            count (int): Number of chunks.
+            texts (dict): field -> (utf-8 buffer, offsets).
+            ints (dict): field -> typed integer column.
+            metadata (list): Table of unique metadata dicts.
+        """
+        self._count = count
+        self._texts = texts
+        self._ints = ints
+        self._metadata = metadata
+
+    # -------------------------
+    # Construction
+    # -------------------------
+    @classmethod
+    def from_documents(cls, documents: Sequence["Document"]) -> "ChunkStore":
+        """
+        Builds an in-memory store from LangChain Documents.
+        Chunk IDs are the positions in `documents`. Derived fields are
+        computed for documents that do not carry them yet.
+        """
+        from app.rag.loader import DERIVED_KEYS, NEIGHBOUR_KEYS, add_derived_fields
+
+        missing = [
+            doc for doc in documents
+            if any(key not in doc.metadata for key in DERIVED_KEYS)
+        ]
+        if missing:
+            add_derived_fields(missing)
+
+        metadata: List[dict] = []
+        meta_index: Dict[str, int] = {}
+        ints = {name: array.array(code) for name, code in INT_FIELDS.items()}
+        linked = bool(documents) and all(
+            NEIGHBOUR_KEYS[0] in doc.metadata for doc in documents
+        )
+        if linked:
+            ints.update(
+                (name, array.array(code)) for name, code in NEIGHBOUR_FIELDS.items()
+            )
+        excluded = set(DERIVED_KEYS) | set(NEIGHBOUR_KEYS) | {"chunk_id"}
+
+        text_buffer, text_offsets = _pack_text(
+            doc.page_content for doc in documents
+        )
+
+        for i, doc in enumerate(documents):
+            meta = {
+                k: v for k, v in doc.metadata.items() if k not in excluded
+            }
+            key = json.dumps(meta, sort_keys=True, default=str)
+            if key not in meta_index:
+                meta_index[key] = len(metadata)
+                metadata.append(json.loads(key))
+            ints["meta_id"].append(meta_index[key])
+            ints["n_tokens"].append(doc.metadata["n_tokens"])
+
+            # The reranker input is a prefix of the chunk text,
+            # so an end offset is enough to slice it back out.
+            rerank_bytes = len(doc.metadata["rerank_text"].encode("utf-8"))
+            ints["rerank_end"].append(text_offsets[i] + rerank_bytes)
+
+            if linked:
+                ints["prev_id"].append(doc.metadata["prev_chunk"])
+                ints["next_id"].append(doc.metadata["next_chunk"])
+
+        texts = {
+            "text": (text_buffer, text_offsets),
+            "context": _pack_text(
+                doc.metadata["context_text"] for doc in documents
+            ),
+            "bm25_tokens": _pack_text(
+                " ".join(doc.metadata["bm25_tokens"]) for doc in documents
+            ),
+        }
+        return cls(len(documents), texts, ints, metadata)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the store to `path`. The manifest is written last (atomically),
+        so a half-written directory is never mistaken for a valid store.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        for name, (buffer, offsets) in self._texts.items():
+            with open(os.path.join(path, f"{name}.bin"), "wb") as f:
+                f.write(buffer)
+            with open(os.path.join(path, f"{name}.offsets"), "wb") as f:
+                f.write(memoryview(offsets).cast("B"))
+
+        for name, column in self._ints.items():
+            with open(os.path.join(path, f"{name}.col"), "wb") as f:
+                f.write(memoryview(column).cast("B"))
+
+        manifest = {
+            "format": _FORMAT_VERSION,
+            "count": self._count,
+            "text_fields": list(self._texts),
+            "int_fields": {
+                name: column.typecode if isinstance(column, array.array)
+                else column.format
+                for name, column in self._ints.items()
+            },
+            "metadata": self._metadata,
+        }
+        tmp_path = os.path.join(path, _MANIFEST + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(path, _MANIFEST))
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.isfile(os.path.join(path, _MANIFEST))
+
+    @classmethod
+    def open(cls, path: str) -> "ChunkStore":
+        """
+        Opens a saved store with every buffer memory-mapped (read-only).
+        """
+        with open(os.path.join(path, _MANIFEST)) as f:
+            manifest = json.load(f)
+
+        if manifest.get("format") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported chunk store format in {path}")
+
+        texts = {}
+        for name in manifest["text_fields"]:
+            buffer = _map_file(os.path.join(path, f"{name}.bin"))
+            offsets = memoryview(
+                _map_file(os.path.join(path, f"{name}.offsets"))
+            ).cast("q")
+            texts[name] = (buffer, offsets)
+
+        ints = {}
+        for name, typecode in manifest["int_fields"].items():
+            column = _map_file(os.path.join(path, f"{name}.col"))
+            ints[name] = memoryview(column).cast(typecode)
+
+        return cls(manifest["count"], texts, ints, manifest["metadata"])
+
+    # -------------------------
+    # Access
+    # -------------------------
+    def __len__(self) -> int:
+        return self._count
+
+    def field(self, name: str, chunk_id: int) -> str:
+        """Returns the value of text field `name` for one chunk."""
+        buffer, offsets = self._texts[name]
+        return str(buffer[offsets[chunk_id]:offsets[chunk_id + 1]], "utf-8")
+
+    def int_field(self, name: str, chunk_id: int) -> int:
+        return self._ints[name][chunk_id]
+
+    def text(self, chunk_id: int) -> str:
+        return self.field("text", chunk_id)
+
+    def context(self, chunk_id: int) -> str:
+        """Cleaned text, ready to be placed in the LLM prompt."""
+        return self.field("context", chunk_id)
+
+    def rerank_text(self, chunk_id: int) -> str:
+        """Truncated text fed to the cross-encoder."""
+        buffer, offsets = self._texts["text"]
+        end = self._ints["rerank_end"][chunk_id]
+        return str(buffer[offsets[chunk_id]:end], "utf-8")
+
+    def n_tokens(self, chunk_id: int) -> int:
+        """LLM-tokenizer token count of the cleaned context text."""
+        return self._ints["n_tokens"][chunk_id]
+
+    def neighbours(self, chunk_id: int) -> Tuple[Optional[int], Optional[int]]:
+        """
+        IDs of the chunks before and after this one, (None, None) if the
+        store has no neighbour links (overlapping chunks).
+        """
+        if "prev_id" not in self._ints:
+            return None, None
+        prev_id = self._ints["prev_id"][chunk_id]
+        next_id = self._ints["next_id"][chunk_id]
+        return (
+            prev_id if prev_id >= 0 else None,
+            next_id if next_id >= 0 else None,
+        )
+
+    def bm25_tokens(self, chunk_id: int) -> List[str]:
+        tokens = self.field("bm25_tokens", chunk_id)
+        return tokens.split(" ") if tokens else []
+
+    def metadata(self, chunk_id: int, with_derived: bool = False) -> dict:
+        """
+        Returns a fresh metadata dict (safe to mutate) incl. `chunk_id`.
+        With `with_derived`, the precomputed fields are included as well
+        (this is what gets written to the Qdrant payload).
+        """
+        meta = dict(self._metadata[self._ints["meta_id"][chunk_id]])
+        meta["chunk_id"] = chunk_id
+        if with_derived:
+            meta["context_text"] = self.context(chunk_id)
+            meta["rerank_text"] = self.rerank_text(chunk_id)
+            meta["n_tokens"] = self.n_tokens(chunk_id)
+            meta["bm25_tokens"] = self.bm25_tokens(chunk_id)
+        return meta
+
+    def document(self, chunk_id: int, with_derived: bool = False) -> "Document":
+        from langchain_core.documents import Document
+
+        return Document(
+            page_content=self.text(chunk_id),
+            metadata=self.metadata(chunk_id, with_derived),
+        )
+
+    def documents(
+        self, chunk_ids: Iterable[int], with_derived: bool = False
+    ) -> List["Document"]:
+        return [self.document(i, with_derived) for i in chunk_ids]
+
+
+# -----------------------------
+# Persistence helpers
+# -----------------------------
+CHUNK_STORE_DIR = os.getenv("CHUNK_STORE_DIR", "data/index")
+
+
+def get_chunk_store_path(collection_name: str) -> str:
+    return os.path.join(CHUNK_STORE_DIR, collection_name)
+
+
+def load_chunk_store(
+    pdf_path: str,
+    path: str,
+    rebuild: bool = False,
+) -> ChunkStore:
+    """
+    Opens the store at `path`, building it from `pdf_path` first if it
+    does not exist yet (or if `rebuild` is set).
+    """
+    if not rebuild and ChunkStore.exists(path):
+        try:
+            return ChunkStore.open(path)
+        except ValueError as e:
+            # Older on-disk format: rebuild with the current fields.
+            print(f"⚠️ {e}; rebuilding.")
+
+    from app.rag.loader import load_and_split_pdf
+
+    store = ChunkStore.from_documents(load_and_split_pdf(pdf_path))
+    try:
+        store.save(path)
+    except OSError as e:
+        # Read-only filesystem: keep serving from memory.
+        print(f"⚠️ Could not persist chunk store to {path}: {e}")
+        return store
+
+    # Re-open so the buffers are file-backed (shared across processes).
+    return ChunkStore.open(path)
@@ -0,0 +1,180 @@
+"""
+Knowledge-Base Collections
+--------------------------
+Configuration and lifecycle of named document collections (e.g. one per
+team or tenant). Each collection has its own source document, Qdrant
+collection (dense index) and chunk store / BM25 index (sparse index).
+
+Collections are configured via RAG_COLLECTIONS, either inline JSON or a
+path to a JSON file, holding a list like:
+
+    [
+      {"name": "default", "qdrant_collection": "hybrid_rag_docs",
+       "source_path": "data/Ebook-Agentic-AI.pdf"},
+      {"name": "hr", "qdrant_collection": "hr_docs",
+       "source_path": "data/hr-handbook.pdf", "dense_k": 10, "timeout": 2.0}
+    ]
+
+Without RAG_COLLECTIONS, a single "default" collection is used.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, Generic, List, Optional, TypeVar
+
+PDF_PATH = "data/Ebook-Agentic-AI.pdf"
+DEFAULT_COLLECTION = "default"
+DEFAULT_QDRANT_COLLECTION = "hybrid_rag_docs"
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class CollectionConfig:
+    """
+    Static description of one knowledge base.
+
+    dense_k / bm25_k default to the retriever's settings when unset;
+    timeout bounds how long a query waits for this collection.
+    """
+    name: str
+    qdrant_collection: str
+    source_path: str
+    dense_k: Optional[int] = None
+    bm25_k: Optional[int] = None
+    timeout: float = 5.0
+
+
+def load_collection_configs() -> Dict[str, CollectionConfig]:
+    """
+    Reads collection definitions from RAG_COLLECTIONS (JSON or file path).
+    """
+    raw = os.getenv("RAG_COLLECTIONS", "").strip()
+
+    if not raw:
+        default = CollectionConfig(
+            name=DEFAULT_COLLECTION,
+            qdrant_collection=DEFAULT_QDRANT_COLLECTION,
+            source_path=PDF_PATH,
+        )
+        return {default.name: default}
+
+    if not raw.startswith("["):
+        with open(raw) as f:
+            raw = f.read()
+
+    configs = [CollectionConfig(**entry) for entry in json.loads(raw)]
+    return {config.name: config for config in configs}
+
+
+class CollectionRegistry(Generic[T]):
+    """
+    Loads collections on first use and keeps at most `max_loaded` of them
+    in memory (least recently used are evicted first).
+
+    Loading happens outside the registry lock, so a slow load of one
+    collection never blocks queries against already-loaded ones.
+    Evicted collections are simply dropped; queries still holding a
+    reference finish normally. The same holds for `reload`, which swaps in
+    a freshly loaded copy (e.g. a new corpus version).
+    """
+
+    def __init__(
+        self,
+        configs: Dict[str, CollectionConfig],
+        loader: Callable[[CollectionConfig], T],
+        max_loaded: int = 8,
+    ):
+        self.configs = configs
+        self.max_loaded = max_loaded
+        self._loader = loader
+        self._loaded: "OrderedDict[str, T]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def names(self) -> List[str]:
+        return list(self.configs)
+
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return list(self._loaded)
+
+    def get(self, name: str) -> T:
+        """Returns the loaded collection, loading it if necessary."""
+        with self._lock:
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+                return self._loaded[name]
+            if name not in self.configs:
+                raise KeyError(f"Unknown collection: {name}")
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # One loader per collection; concurrent callers wait for it.
+        with load_lock:
+            with self._lock:
+                if name in self._loaded:
+                    self._loaded.move_to_end(name)
+                    return self._loaded[name]
+
+            collection = self._loader(self.configs[name])
+
+            with self._lock:
+                self._loaded[name] = collection
+                while len(self._loaded) > self.max_loaded:
+                    evicted, _ = self._loaded.popitem(last=False)
+                    print(f"♻️ Evicted collection '{evicted}'")
+
+        return collection
+
+    def preload(self) -> List[str]:
+        """
+        Loads the configured collections (at most `max_loaded`), so the
+        first queries do not pay for cold loads. Returns the loaded names.
+        """
+        names = self.names()[: self.max_loaded]
+        for name in names:
+            self.get(name)
+        return names
+
+    def peek(self, name: str) -> Optional[T]:
+        """The loaded collection (None if not loaded); does not load it."""
+        with self._lock:
+            return self._loaded.get(name)
+
+    def reload(self, name: str) -> Optional[T]:
+        """
+        Loads a fresh copy of a loaded collection and swaps it in atomically.
+        Returns the replaced copy (None if the collection is not loaded,
+        or was evicted while reloading).
+        """
+        with self._lock:
+            if name not in self._loaded:
+                return None
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Queries keep using the loaded copy while the new one loads.
+        with load_lock:
+            collection = self._loader(self.configs[name])
+
+            with self._lock:
+                if name not in self._loaded:
+                    return None
+                previous = self._loaded[name]
+                self._loaded[name] = collection
+
+        return previous
+
+    def evict(self, name: str) -> None:
+        with self._lock:
+            self._loaded.pop(name, None)
+
+    def reset_locks(self) -> None:
+        """
+        Re-creates the locks, e.g. in a forked child: another thread of
+        the parent may have held one at fork time.
+        """
+        self._lock = threading.Lock()
+        self._load_locks = {}
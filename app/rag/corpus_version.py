@@ -0,0 +1,141 @@
+"""
+Corpus Versions
+---------------
+Lets a collection's corpus be updated while it is being served.
+
+Every ingest of changed source content builds a new, immutable set of
+indexes under a versioned name (`<collection>__<version>`): chunk store
+directory, local vector index, or Qdrant collection. The indexes that are
+being served are never modified in place. Once everything is built,
+ingest publishes the new version by atomically replacing a small pointer
+file next to the chunk store (`<collection>.version`).
+
+Serving processes poll the pointer (see CorpusWatcher in retriever.py),
+build the new BM25 / chunk index in the background and swap it in.
+Queries already running finish on the version they started with.
+
+Old versions are not deleted as soon as a new one is published: servers
+poll at their own pace and may still be serving an older version. Ingest
+first marks an unused version as retired (`<index_name>.retired`) and
+deletes it only once it has been retired for RAG_VERSION_GRACE seconds
+(default 1 hour). The grace period must exceed the slowest server's
+RAG_RELOAD_INTERVAL plus its longest query.
+
+The version ID is a fingerprint of the source document and the chunking
+settings, so re-running ingest without changes publishes nothing.
+Collections ingested before versioning existed have no pointer file and
+are served from their unversioned names.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Iterable, List, NamedTuple, Optional
+
+from app.rag.chunk_store import get_chunk_store_path
+
+# Seconds a retired version is kept before ingest deletes it.
+RAG_VERSION_GRACE = float(os.getenv("RAG_VERSION_GRACE", "3600"))
+
+_POINTER_SUFFIX = ".version"
+_RETIRED_SUFFIX = ".retired"
+_VERSION_SEPARATOR = "__"
+
+
+class CorpusVersion(NamedTuple):
+    """A published corpus: version ID and the physical index name."""
+    version: str
+    index_name: str
+
+
+def source_version(source_path: str) -> Optional[str]:
+    """
+    Fingerprint of the source document and the chunking settings
+    (None if the source is not available).
+    """
+    from app.rag import loader
+
+    digest = hashlib.sha256()
+    try:
+        with open(source_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except OSError:
+        return None
+
+    # Re-chunking changes the chunk IDs, so it needs a new version too.
+    settings = (loader.CHUNK_SIZE, loader.CHUNK_OVERLAP, loader.RERANK_CHARS)
+    digest.update(repr(settings).encode())
+    return digest.hexdigest()[:12]
+
+
+def versioned_name(collection_name: str, version: str) -> str:
+    return f"{collection_name}{_VERSION_SEPARATOR}{version}"
+
+
+def version_names(collection_name: str, names: Iterable[str]) -> List[str]:
+    """The versioned index names of a collection among `names`."""
+    prefix = collection_name + _VERSION_SEPARATOR
+    return [name for name in names if name.startswith(prefix)]
+
+
+def index_name_of(entry: str) -> str:
+    """
+    The index name a CHUNK_STORE_DIR entry belongs to (chunk store dir,
+    local vector index "<name>.vectors" or retirement marker).
+    """
+    for suffix in (".vectors", _RETIRED_SUFFIX):
+        if entry.endswith(suffix):
+            return entry[: -len(suffix)]
+    return entry
+
+
+def retire_index(index_name: str) -> float:
+    """
+    Marks a version's indexes as no longer published (idempotent).
+    Returns the time it was retired.
+    """
+    path = get_chunk_store_path(index_name) + _RETIRED_SUFFIX
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        open(path, "w").close()
+        return time.time()
+
+
+def unretire_index(index_name: str) -> None:
+    """Clears the mark, e.g. when an old version is published again."""
+    try:
+        os.remove(get_chunk_store_path(index_name) + _RETIRED_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+
+def _pointer_path(collection_name: str) -> str:
+    return get_chunk_store_path(collection_name) + _POINTER_SUFFIX
+
+
+def read_corpus_version(collection_name: str) -> Optional[CorpusVersion]:
+    """
+    The published version of a collection (None: never published).
+    """
+    try:
+        with open(_pointer_path(collection_name)) as f:
+            return CorpusVersion(**json.load(f))
+    except FileNotFoundError:
+        return None
+
+
+def publish_corpus_version(collection_name: str, version: CorpusVersion) -> None:
+    """
+    Makes `version` the one served; atomic, so readers never see a
+    half-written pointer.
+    """
+    path = _pointer_path(collection_name)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(version._asdict(), f)
+    os.replace(tmp_path, path)
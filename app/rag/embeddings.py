@@ -4,17 +4,52 @@ Embeddings Module
 This module initializes the embedding model used for vectorization
 in the RAG pipeline.
 
+Query embeddings from concurrent requests are batched into one forward
+pass (app/rag/batcher.py) unless ENCODER_BATCHING=false.
 """
 
 import os
+from typing import List, Optional, TYPE_CHECKING
 from dotenv import load_dotenv
-from langchain_huggingface import HuggingFaceEmbeddings
+from app.rag.batcher import DynamicBatcher
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
 
 load_dotenv()
 
+ENCODER_BATCHING = os.getenv("ENCODER_BATCHING", "true").lower() == "true"
+EMBED_MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", "32"))
+
 _EMBEDDINGS = None  
 
 
+class BatchedEmbeddings:
+    """
+    Embeddings whose `embed_query` calls from concurrent requests share
+    one model call. Bulk `embed_documents` (ingest) goes straight to the
+    model, which batches it already.
+
+    Registered as a virtual subclass of LangChain's `Embeddings` when the
+    model loads, so importing this module stays cheap.
+    """
+
+    def __init__(self, base: "Embeddings"):
+        self.base = base
+        # Queries use the same encode kwargs as documents (see get_embeddings),
+        # so a batch of queries is a plain embed_documents call.
+        self.batcher = DynamicBatcher(
+            base.embed_documents, name="embed", max_batch_size=EMBED_MAX_BATCH_SIZE
+        )
+
+    def embed_query(self, text: str, deadline: Optional[float] = None) -> List[float]:
+        """Raises concurrent.futures.TimeoutError past the deadline."""
+        return self.batcher.submit([text], deadline)[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.base.embed_documents(texts)
+
+
 def get_embeddings():
     """
     Initializes and returns the Hugging Face embedding model.
@@ -30,11 +65,17 @@ def get_embeddings():
         "BAAI/bge-small-en-v1.5"
     )
 
+    from langchain_core.embeddings import Embeddings
+    from langchain_huggingface import HuggingFaceEmbeddings
+
     print(f" Loading embeddings model: {model_name}")
 
     _EMBEDDINGS = HuggingFaceEmbeddings(
         model_name=model_name,
         encode_kwargs={"normalize_embeddings": True}
     )
+    if ENCODER_BATCHING:
+        Embeddings.register(BatchedEmbeddings)
+        _EMBEDDINGS = BatchedEmbeddings(_EMBEDDINGS)
 
     return _EMBEDDINGS
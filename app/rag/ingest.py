@@ -1,51 +1,168 @@
 """
-Ingestion Pipeline 
+Ingestion Pipeline
 ------------------------
 This module handles the "Extract, Transform, Load" workflow for RAG.
 1. Extract: Load text from the source PDF.
-2. Transform: Split text into chunks (handled by loader.py).
-3. Load: Embed the chunks and upload them to the Qdrant Vector Database.
+2. Transform: Split text into chunks (handled by loader.py) and persist
+   them in the compact chunk store (chunk_store.py).
+3. Load: Embed the chunks and upload them to the vector index
+   (Qdrant, or the local index with VECTOR_BACKEND=local).
 
 This script is designed to be idempotent—meaning running it multiple times
 won't corrupt your database with duplicate data.
+
+When a collection's source changes, ingest builds a new corpus version
+next to the one being served and then publishes it (corpus_version.py);
+running servers swap to it without a restart. Versions that are no longer
+published are deleted after a grace period (RAG_VERSION_GRACE), so servers
+that have not swapped yet keep working. Run it with:
+    python -m app.rag.ingest
 """
 
-from app.rag.loader import load_and_split_pdf
+import os
+import shutil
+import time
+
+from app.rag.chunk_store import (
+    CHUNK_STORE_DIR,
+    ChunkStore,
+    get_chunk_store_path,
+    load_chunk_store,
+)
+from app.rag.collection_registry import CollectionConfig, load_collection_configs
+from app.rag.corpus_version import (
+    RAG_VERSION_GRACE,
+    CorpusVersion,
+    index_name_of,
+    publish_corpus_version,
+    read_corpus_version,
+    retire_index,
+    source_version,
+    unretire_index,
+    version_names,
+    versioned_name,
+)
 from app.rag.vector_store import (
+    VECTOR_BACKEND,
+    count_vectors,
+    delete_vector_index,
     get_vector_store,
-    get_qdrant_client,
-    get_collection_name,
+    list_vector_indexes,
 )
 
-PDF_PATH = "data/Ebook-Agentic-AI.pdf"
 
 def ingest_documents():
     """
     Main entry point for data ingestion.
-    Checks if the vector DB is empty before ingesting to avoid duplicates.
+    Ingests every configured collection (see collection_registry.py).
+    """
+    for config in load_collection_configs().values():
+        ingest_collection(config)
+
+
+def ingest_collection(config: CollectionConfig):
+    """
+    Ingests one collection.
+    Builds a new corpus version when the source changed since the published
+    one; otherwise only makes sure the published version is complete.
+    """
+    collection = config.qdrant_collection
+    current = read_corpus_version(collection)
+    version = source_version(config.source_path)
+
+    if current is None and ChunkStore.exists(get_chunk_store_path(collection)):
+        # Ingested before versioning: keep serving the unversioned indexes.
+        # Their content is unknown, so they never match a source version;
+        # the current source is built under a versioned name below.
+        current = CorpusVersion("unversioned", collection)
+        publish_corpus_version(collection, current)
+
+    if version is None or (current is not None and current.version == version):
+        # Unchanged (or source unavailable): keep the published version.
+        target = current or CorpusVersion("unversioned", collection)
+    else:
+        target = CorpusVersion(version, versioned_name(collection, version))
+        print(f"📦 Building version {version} of '{config.name}'...")
+
+    _ingest_index(config, target.index_name)
+
+    if target != current:
+        unretire_index(target.index_name)
+        publish_corpus_version(collection, target)
+        print(f"✅ Published version {target.version} of '{config.name}'.")
+
+    _prune_versions(collection, target.index_name)
+
+
+def _ingest_index(config: CollectionConfig, index_name: str):
+    """
+    Builds the chunk store and vector index stored under `index_name`.
+    Checks if the vector collection is empty before ingesting to avoid duplicates.
     """
 
     #  Ensure collection exists FIRST
-    vector_store = get_vector_store()
+    vector_store = get_vector_store(index_name)
+
+    # Load and Split (Extract & Transform) into the local chunk store.
+    # This is a no-op if the store was already built.
+    store = load_chunk_store(config.source_path, get_chunk_store_path(index_name))
 
-    client = get_qdrant_client()
-    collection_name = get_collection_name()
-    
     # We count how many vectors are currently in the collection.
-    count = client.count(
-        collection_name=collection_name,
-        exact=True,
-    ).count
+    count = count_vectors(index_name)
 
     if count > 0:
-        print("✅ Documents already embedded. Skipping ingestion.")
+        print(f"✅ '{config.name}' already embedded. Skipping ingestion.")
         return
 
-    print("📁 Ingesting documents into Qdrant Cloud...")
-    
-    # Load and Split (Extract & Transform)
-    documents = load_and_split_pdf(PDF_PATH)
+    print(f"📁 Ingesting '{config.name}' into the {VECTOR_BACKEND} vector index...")
+
     # Embed and Upload (Load)
-    vector_store.add_documents(documents)
+    # Each payload carries its `chunk_id` (so dense hits map straight back
+    # to the chunk store) and the fields precomputed at ingest time.
+    vector_store.add_documents(
+        store.documents(range(len(store)), with_derived=True)
+    )
 
     print("✅ Ingestion completed.")
+
+
+def _prune_versions(collection: str, published: str):
+    """
+    Retires the versions other than `published` and deletes those retired
+    for at least RAG_VERSION_GRACE seconds: a server may still be serving
+    an older version until its CorpusWatcher swaps.
+    This includes the unversioned indexes of a collection ingested before
+    versioning, once a versioned build replaced them.
+    """
+    def is_version(name: str) -> bool:
+        return name == collection or bool(version_names(collection, [name]))
+
+    vector_indexes = {name for name in list_vector_indexes() if is_version(name)}
+    entries = []
+    if os.path.isdir(CHUNK_STORE_DIR):
+        # Chunk stores, local vector indexes and retirement marks
+        entries = [
+            entry for entry in os.listdir(CHUNK_STORE_DIR)
+            if is_version(index_name_of(entry))
+        ]
+
+    names = vector_indexes | {index_name_of(entry) for entry in entries}
+    now = time.time()
+
+    for name in sorted(names - {published}):
+        if now - retire_index(name) < RAG_VERSION_GRACE:
+            continue
+
+        print(f"🗑️ Deleting old index '{name}'")
+        if name in vector_indexes:
+            delete_vector_index(name)
+        for entry in entries:
+            path = os.path.join(CHUNK_STORE_DIR, entry)
+            if index_name_of(entry) == name and os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+        # The mark goes last, so an interrupted delete is retried.
+        unretire_index(name)
+
+
+if __name__ == "__main__":
+    ingest_documents()
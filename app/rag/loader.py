@@ -5,13 +5,35 @@ This module handles the "Extract" and "Transform" phases of the RAG pipeline:
 1. Loading: Reads the raw PDF file from disk.
 2. Cleaning: Removes noise (headers, excessive whitespace) to improve embedding quality.
 3. Splitting: Breaks long text into smaller, overlapping chunks (tokens) for the Vector DB.
+   With CHUNK_OVERLAP=0 the chunks do not overlap; each records the IDs of
+   the chunks before and after it instead, and the query path adds
+   neighbouring text to the top hits (HybridRetriever.passages).
+4. Deriving: Precomputes per-chunk fields the query path would otherwise
+   recompute on every request (cleaned context, reranker input, token
+   count, BM25 tokens). They are stored in the chunk metadata, and thus
+   in the Qdrant payload and the chunk store.
 """
 
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List
+from typing import Callable, List, Optional
+import os
 import re
 
+# Chunking defaults (characters). Tune them with the retrieval sweep
+# (app/evaluation/retrieval_sweep.py); changing them requires re-ingesting.
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "300"))
+
+# Characters of chunk text fed to the cross-encoder reranker.
+RERANK_CHARS = 500
+
+# Metadata keys written by `add_derived_fields`.
+DERIVED_KEYS = ("context_text", "rerank_text", "n_tokens", "bm25_tokens")
+
+# Metadata keys written by `link_neighbours` (chunk IDs, -1 = none).
+NEIGHBOUR_KEYS = ("prev_chunk", "next_chunk")
+
+_BM25_TOKEN = re.compile(r"\w+")
+
 
 def clean_text(text: str) -> str:
     """
@@ -33,24 +55,95 @@ def clean_text(text: str) -> str:
     return text.strip()
 
 
+def clean_chunk(text: str) -> str:
+    """
+    Prepares a chunk for the LLM prompt: drops page headers/footers,
+    page numbers and other very short lines.
+    """
+    # Remove headers/footers
+    text = re.sub(r'\d+\s+AGENTIC AI FOR EXECUTIVES', '', text, flags=re.IGNORECASE)
+    lines = text.splitlines()
+    cleaned = []
+    for line in lines:
+        line = line.strip()
+        if len(line) < 5 or line.isdigit():
+            continue
+        cleaned.append(line)
+    return " ".join(cleaned)
 
-def load_and_split_pdf(
-    pdf_path: str,
-    chunk_size: int = 800,
-    chunk_overlap: int = 200
+
+def bm25_tokenize(text: str) -> List[str]:
+    """
+    Lower-cased word tokens used for BM25 (both corpus and queries).
+    """
+    return _BM25_TOKEN.findall(text.lower())
+
+
+def add_derived_fields(
+    chunks: List,
+    count_tokens: Optional[Callable[[str], int]] = None,
 ) -> List:
     """
-    Loads a PDF file and splits it into chunks suitable for RAG.
+    Computes deterministic per-chunk fields once, at ingest time.
+
+    Args:
+        chunks (List[Document]): Chunks to annotate (modified in place)
+        count_tokens (callable): Token counter; defaults to the LLM tokenizer
+
+    Returns:
+        List[Document]: The same chunks, with DERIVED_KEYS in their metadata
+    """
+    if count_tokens is None:
+        from app.llm.llm_client import count_tokens
+
+    for chunk in chunks:
+        context_text = clean_chunk(chunk.page_content)
+        chunk.metadata["context_text"] = context_text
+        chunk.metadata["rerank_text"] = chunk.page_content[:RERANK_CHARS]
+        chunk.metadata["n_tokens"] = count_tokens(context_text)
+        chunk.metadata["bm25_tokens"] = bm25_tokenize(chunk.page_content)
+
+    return chunks
+
+
+def link_neighbours(chunks: List) -> List:
+    """
+    Records the IDs (positions) of the previous and next chunk of the same
+    source in each chunk's metadata. Only meaningful for chunks that do not
+    overlap: then a chunk plus its neighbours is a contiguous passage.
+
+    Args:
+        chunks (List[Document]): Chunks in document order (modified in place)
+
+    Returns:
+        List[Document]: The same chunks, with NEIGHBOUR_KEYS in their metadata
+    """
+    def same_source(i: int, j: int) -> bool:
+        return (
+            0 <= j < len(chunks)
+            and chunks[j].metadata.get("source") == chunks[i].metadata.get("source")
+        )
+
+    for i, chunk in enumerate(chunks):
+        chunk.metadata["prev_chunk"] = i - 1 if same_source(i, i - 1) else -1
+        chunk.metadata["next_chunk"] = i + 1 if same_source(i, i + 1) else -1
+
+    return chunks
+
+
+def load_pdf(pdf_path: str) -> List:
+    """
+    Loads a PDF file (one Document per page) and cleans its text.
 
     Args:
         pdf_path (str): Path to the PDF file
-        chunk_size (int): Size of each chunk (tokens/characters)
-        chunk_overlap (int): Overlap between chunks
 
     Returns:
-        List[Document]: List of chunked LangChain Documents
+        List[Document]: Cleaned page Documents
     """
 
+    from langchain_community.document_loaders import PyPDFLoader
+
     # Load PDF
     loader = PyPDFLoader(pdf_path)
     documents = loader.load()
@@ -59,17 +152,73 @@ def load_and_split_pdf(
     for doc in documents:
         doc.page_content = clean_text(doc.page_content)
 
+    return documents
+
+
+def split_documents(
+    documents: List,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    derive_fields: bool = True,
+) -> List:
+    """
+    Splits page Documents into chunks suitable for RAG.
+    The input Documents are left untouched.
+
+    Args:
+        documents (List[Document]): Cleaned page Documents
+        chunk_size (int): Size of each chunk (characters)
+        chunk_overlap (int): Overlap between chunks (0: no overlap, chunks
+            are linked to their neighbours instead, see link_neighbours)
+        derive_fields (bool): Precompute query-time fields (see add_derived_fields)
+
+    Returns:
+        List[Document]: List of chunked LangChain Documents
+    """
+
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
     # Split documents into chunks
     splitter = RecursiveCharacterTextSplitter(
-    chunk_size=1000,          # bigger chunks
-    chunk_overlap=300,        # reduce overlap
-    separators=[
-        "\n\n",               
-        "\n",
-        ". ",
-    ]
-)
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=[
+            "\n\n",
+            "\n",
+            ". ",
+        ]
+    )
 
     chunks = splitter.split_documents(documents)
 
+    if chunk_overlap == 0:
+        link_neighbours(chunks)
+
+    if derive_fields:
+        add_derived_fields(chunks)
+
     return chunks
+
+
+def load_and_split_pdf(
+    pdf_path: str,
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    derive_fields: bool = True,
+) -> List:
+    """
+    Loads a PDF file and splits it into chunks suitable for RAG.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+        chunk_size (int): Size of each chunk (characters)
+        chunk_overlap (int): Overlap between chunks
+        derive_fields (bool): Precompute query-time fields (see add_derived_fields)
+
+    Returns:
+        List[Document]: List of chunked LangChain Documents
+    """
+
+    return split_documents(
+        load_pdf(pdf_path), chunk_size, chunk_overlap, derive_fields
+    )
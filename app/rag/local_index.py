@@ -0,0 +1,342 @@
+"""
+Local Vector Index
+------------------
+In-process alternative to Qdrant for dense search (VECTOR_BACKEND=local),
+for air-gapped / edge deployments and tests. No server, no network round
+trip per query.
+
+- Normalized float32 embeddings live in one matrix, saved as .npy and
+  opened memory-mapped (shared across worker processes, like the chunk
+  store).
+- Small corpora (fewer than VECTOR_IVF_MIN_SIZE vectors) use exact search:
+  one matrix product for a batch of queries + argpartition.
+- Large corpora use an IVF index: vectors are clustered (spherical k-means)
+  into ~sqrt(n) lists stored contiguously, and a query only scans the
+  VECTOR_IVF_NPROBE lists with the closest centroids.
+- Rows map to chunk IDs; Documents are built from the collection's chunk
+  store, so the index stores no text.
+
+Layout of an index directory (next to the chunk store):
+    manifest.json      format, dim, count, number of IVF lists
+    vectors.npy        float32 (count, dim), rows grouped by IVF list
+    chunk_ids.npy      int64 (count,), chunk ID of each row
+    centroids.npy      float32 (lists, dim)      (IVF only)
+    list_offsets.npy   int64 (lists + 1)         (IVF only)
+"""
+
+import json
+import os
+from typing import List, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
+    from app.rag.chunk_store import ChunkStore
+
+_MANIFEST = "manifest.json"
+_FORMAT_VERSION = 1
+
+VECTOR_IVF_MIN_SIZE = int(os.getenv("VECTOR_IVF_MIN_SIZE", "5000"))
+VECTOR_IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+
+# k-means is trained on a sample of this many vectors per list.
+_TRAIN_PER_LIST = 64
+_KMEANS_ITERS = 10
+_EMBED_BATCH = 256
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores (best first) along the last axis."""
+    k = min(k, scores.shape[-1])
+    if k == 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.int64)
+    part = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    order = np.argsort(-np.take_along_axis(scores, part, axis=-1), axis=-1)
+    return np.take_along_axis(part, order, axis=-1)
+
+
+def _kmeans(vectors: np.ndarray, n_lists: int, seed: int) -> np.ndarray:
+    """Spherical k-means (cosine) on a sample; returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    n_train = min(len(vectors), n_lists * _TRAIN_PER_LIST)
+    sample = vectors[np.sort(rng.choice(len(vectors), n_train, replace=False))]
+    centroids = sample[rng.choice(n_train, n_lists, replace=False)].copy()
+
+    for _ in range(_KMEANS_ITERS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = ~np.bincount(assign, minlength=n_lists).astype(bool)
+        # Re-seed empty lists with random sample vectors.
+        sums[empty] = sample[rng.choice(n_train, int(empty.sum()))]
+        centroids = _normalize(sums)
+
+    return centroids
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over normalized vectors, addressed by chunk ID.
+    """
+
+    __slots__ = ("vectors", "chunk_ids", "centroids", "list_offsets")
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        chunk_ids: np.ndarray,
+        centroids: Optional[np.ndarray] = None,
+        list_offsets: Optional[np.ndarray] = None,
+    ):
+        """
+        Args:
+            vectors (ndarray): (count, dim) unit vectors, grouped by list
+            chunk_ids (ndarray): (count,) chunk ID of every row
+            centroids (ndarray): (lists, dim) IVF centroids, None for exact
+            list_offsets (ndarray): (lists + 1,) row range of every list
+        """
+        self.vectors = vectors
+        self.chunk_ids = chunk_ids
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        chunk_ids: Sequence[int],
+        ivf_min_size: int = VECTOR_IVF_MIN_SIZE,
+        seed: int = 0,
+    ) -> "VectorIndex":
+        """
+        Normalizes the vectors; adds an IVF layer for large corpora.
+        """
+        vectors = _normalize(vectors)
+        chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+
+        if len(vectors) < max(ivf_min_size, 1):
+            return cls(vectors, chunk_ids)
+
+        n_lists = max(1, int(np.sqrt(len(vectors))))
+        centroids = _kmeans(vectors, n_lists, seed)
+        assign = np.argmax(vectors @ centroids.T, axis=1)
+
+        # Store each list contiguously so a probe reads one row range.
+        order = np.argsort(assign, kind="stable")
+        list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=n_lists), out=list_offsets[1:])
+        return cls(vectors[order], chunk_ids[order], centroids, list_offsets)
+
+    @classmethod
+    def empty(cls, dim: int = 0) -> "VectorIndex":
+        return cls(
+            np.zeros((0, dim), dtype=np.float32), np.zeros(0, dtype=np.int64)
+        )
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def save(self, path: str) -> None:
+        """
+        Writes the index to `path`; the manifest is written last (atomically).
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "vectors.npy"), self.vectors)
+        np.save(os.path.join(path, "chunk_ids.npy"), self.chunk_ids)
+        if self.centroids is not None:
+            np.save(os.path.join(path, "centroids.npy"), self.centroids)
+            np.save(os.path.join(path, "list_offsets.npy"), self.list_offsets)
+
+        manifest = {
+            "format": _FORMAT_VERSION,
+            "count": len(self),
+            "dim": self.dim,
+            "lists": 0 if self.centroids is None else len(self.centroids),
+        }
+        tmp_path = os.path.join(path, _MANIFEST + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(path, _MANIFEST))
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.isfile(os.path.join(path, _MANIFEST))
+
+    @classmethod
+    def open(cls, path: str) -> "VectorIndex":
+        """
+        Opens a saved index; the vector matrix is memory-mapped (read-only).
+        """
+        with open(os.path.join(path, _MANIFEST)) as f:
+            manifest = json.load(f)
+
+        if manifest.get("format") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported vector index format in {path}")
+
+        def load(name, mmap_mode=None):
+            return np.load(os.path.join(path, name), mmap_mode=mmap_mode)
+
+        if manifest["count"] == 0:
+            return cls.empty(manifest["dim"])
+
+        ivf = manifest["lists"] > 0
+        return cls(
+            load("vectors.npy", mmap_mode="r"),
+            load("chunk_ids.npy", mmap_mode="r"),
+            load("centroids.npy") if ivf else None,
+            load("list_offsets.npy") if ivf else None,
+        )
+
+    # -------------------------
+    # Search
+    # -------------------------
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        nprobe: int = VECTOR_IVF_NPROBE,
+    ) -> List[List[Tuple[int, float]]]:
+        """
+        Returns, per query, up to k (chunk_id, cosine score) best first.
+
+        Args:
+            queries (ndarray): (dim,) or (n_queries, dim)
+            k (int): Results per query
+            nprobe (int): IVF lists scanned per query (ignored when exact)
+        """
+        queries = _normalize(np.atleast_2d(queries))
+        if len(self) == 0:
+            return [[] for _ in queries]
+
+        if self.centroids is None:
+            # Exact: one (n_queries x count) product for the whole batch.
+            scores = queries @ self.vectors.T
+            rows = _top_k(scores, k)
+            return [
+                [(int(self.chunk_ids[r]), float(s[r])) for r in row]
+                for row, s in zip(rows, scores)
+            ]
+
+        probes = _top_k(queries @ self.centroids.T, nprobe)
+        results = []
+        for query, lists in zip(queries, probes):
+            # Lists are contiguous row ranges: score slices, no gather copy.
+            ranges = [(self.list_offsets[l], self.list_offsets[l + 1]) for l in lists]
+            scores = np.concatenate([self.vectors[a:b] @ query for a, b in ranges])
+            chunk_ids = np.concatenate([self.chunk_ids[a:b] for a, b in ranges])
+            best = _top_k(scores, k)
+            results.append([(int(chunk_ids[i]), float(scores[i])) for i in best])
+        return results
+
+
+class LocalVectorStore:
+    """
+    The part of the LangChain VectorStore API the app uses
+    (`add_documents`, `similarity_search[_by_vector]`), backed by a
+    VectorIndex. Documents must come from a ChunkStore (`chunk_id` in
+    their metadata); hits are materialized from that store.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        path: Optional[str] = None,
+        chunk_store_path: Optional[str] = None,
+        chunks: Optional["ChunkStore"] = None,
+    ):
+        """
+        Args:
+            embeddings: LangChain embeddings (embed_documents / embed_query)
+            path (str): Index directory (None = in memory only)
+            chunk_store_path (str): Chunk store to build hit Documents from
+            chunks (ChunkStore): Already opened chunk store (takes precedence)
+        """
+        self.embeddings = embeddings
+        self.path = path
+        self.chunk_store_path = chunk_store_path
+        self._chunks = chunks
+        self._index = None
+
+    @property
+    def index(self) -> VectorIndex:
+        if self._index is None:
+            if self.path and VectorIndex.exists(self.path):
+                self._index = VectorIndex.open(self.path)
+            else:
+                self._index = VectorIndex.empty()
+        return self._index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _chunk_store(self) -> "ChunkStore":
+        if self._chunks is None:
+            from app.rag.chunk_store import ChunkStore
+
+            self._chunks = ChunkStore.open(self.chunk_store_path)
+        return self._chunks
+
+    def add_documents(self, documents: Sequence["Document"]) -> List[int]:
+        """
+        Embeds the documents and rebuilds (and persists) the index.
+        """
+        if not documents:
+            return []
+
+        chunk_ids = []
+        for doc in documents:
+            chunk_id = doc.metadata.get("chunk_id")
+            if not isinstance(chunk_id, int):
+                raise ValueError(
+                    "LocalVectorStore indexes chunk-store documents; "
+                    "metadata['chunk_id'] is required"
+                )
+            chunk_ids.append(chunk_id)
+
+        texts = [doc.page_content for doc in documents]
+        vectors = [
+            vector
+            for start in range(0, len(texts), _EMBED_BATCH)
+            for vector in self.embeddings.embed_documents(
+                texts[start:start + _EMBED_BATCH]
+            )
+        ]
+
+        new_vectors = np.asarray(vectors, dtype=np.float32)
+        if len(self.index):
+            new_vectors = np.concatenate([self.index.vectors, new_vectors])
+            chunk_ids = list(self.index.chunk_ids) + chunk_ids
+
+        self._index = VectorIndex.build(new_vectors, chunk_ids)
+        if self.path:
+            self._index.save(self.path)
+            # Serve from the memory-mapped copy.
+            self._index = VectorIndex.open(self.path)
+
+        return chunk_ids
+
+    def similarity_search_by_vector(
+        self, embedding: Sequence[float], k: int = 4, **kwargs
+    ) -> List["Document"]:
+        hits = self.index.search(np.asarray(embedding), k)[0]
+        store = self._chunk_store()
+        return store.documents(chunk_id for chunk_id, _ in hits)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs) -> List["Document"]:
+        return self.similarity_search_by_vector(
+            self.embeddings.embed_query(query), k
+        )
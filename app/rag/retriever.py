@@ -8,43 +8,420 @@ This module implements a state-of-the-art retrieval pipeline that combines:
 
 This approach solves the common limitations of purely vector-based RAG
 by ensuring both conceptual understanding and precise keyword matching.
+
+Several knowledge bases (collections) can be searched at once: they are
+queried in parallel (per-collection k and timeout), their candidates are
+merged globally with Reciprocal Rank Fusion, and only then reranked.
+
+Under a deadline (see app/utils/deadline.py) retrieval degrades instead of
+overrunning: a collection whose dense search is late contributes BM25
+results only, and reranking is skipped when too little time is left.
+
+Corpus updates are picked up without a restart: a CorpusWatcher polls the
+published corpus versions (app/rag/corpus_version.py) and swaps new
+indexes in. Each query resolves a collection once, so it runs entirely on
+one version; `HybridRetriever.versions` records which.
 """
 
-from typing import List
+import heapq
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union, TYPE_CHECKING
 from langchain_core.documents import Document
-from langchain_community.retrievers import BM25Retriever
-from sentence_transformers import CrossEncoder
-from app.rag.vector_store import get_vector_store
-from app.rag.loader import load_and_split_pdf
+from app.rag.batcher import DynamicBatcher
+from app.rag.embeddings import ENCODER_BATCHING, BatchedEmbeddings, get_embeddings
+from app.rag.vector_store import get_vector_store, release_vector_store
+from app.rag.chunk_store import (
+    ChunkStore,
+    get_chunk_store_path,
+    load_chunk_store,
+)
+from app.rag.collection_registry import (
+    CollectionConfig,
+    CollectionRegistry,
+    load_collection_configs,
+)
+from app.rag.corpus_version import read_corpus_version
+from app.rag.loader import RERANK_CHARS, bm25_tokenize, clean_chunk
+from app.utils.deadline import time_left
+
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder
+
+
+# Reciprocal Rank Fusion constant (standard value from the RRF paper).
+RRF_K = 60
+
+# Below this many seconds before the deadline, reranking is skipped.
+RAG_RERANK_MIN_TIME = float(os.getenv("RAG_RERANK_MIN_TIME", "0.5"))
+
+RERANK_MAX_BATCH_SIZE = int(os.getenv("RERANK_MAX_BATCH_SIZE", "64"))
+
+# Longest wait for a cold collection load; the load itself keeps running.
+RAG_LOAD_TIMEOUT = float(os.getenv("RAG_LOAD_TIMEOUT", "30"))
+
+# Seconds between checks for a new corpus version (0 = never reload).
+RAG_RELOAD_INTERVAL = float(os.getenv("RAG_RELOAD_INTERVAL", "30"))
+
+
+class BM25Index:
+    """
+    Sparse keyword index over a ChunkStore.
+    Returns chunk IDs instead of Document copies.
+    """
+
+    def __init__(self, store: ChunkStore):
+        from rank_bm25 import BM25Okapi
+
+        self.size = len(store)
+        # Token lists are precomputed at ingest time.
+        corpus = [store.bm25_tokens(i) for i in range(self.size)]
+        self._bm25 = BM25Okapi(corpus) if corpus else None
+
+    def search(self, query: str, k: int) -> List[int]:
+        if self._bm25 is None:
+            return []
+        scores = self._bm25.get_scores(bm25_tokenize(query))
+        return heapq.nlargest(k, range(self.size), key=scores.__getitem__)
+
+
+class KnowledgeBase:
+    """
+    Runtime indexes of one collection: chunk store, BM25 and Qdrant,
+    all of one corpus version.
+    """
+
+    def __init__(
+        self,
+        config: CollectionConfig,
+        store: ChunkStore,
+        bm25: BM25Index,
+        vector_store,
+        version: Optional[str] = None,
+        index_name: Optional[str] = None,
+    ):
+        """
+        Args:
+            version (str): Corpus version (None = unversioned).
+            index_name (str): Name of the version's chunk store and vector
+                collection (default: config.qdrant_collection).
+        """
+        self.config = config
+        self.name = config.name
+        self.store = store
+        self.bm25 = bm25
+        self._vector_store = vector_store
+        self.version = version
+        self.index_name = index_name or config.qdrant_collection
+
+    @property
+    def vector_store(self):
+        # Fetched again after reconnect() (e.g. in a forked worker).
+        if self._vector_store is None:
+            self._vector_store = get_vector_store(self.index_name)
+        return self._vector_store
+
+    def reconnect(self) -> None:
+        """Drops the vector store; the next search fetches a fresh one."""
+        self._vector_store = None
+
+    def _to_candidate(self, doc: Document) -> "Candidate":
+        chunk_id = doc.metadata.get("chunk_id")
+        if isinstance(chunk_id, int) and 0 <= chunk_id < len(self.store):
+            return Hit(self, chunk_id)
+        return doc
+
+    def dense_search(
+        self, query_vector: List[float], dense_k: int
+    ) -> List["Candidate"]:
+        dense_docs = self.vector_store.similarity_search_by_vector(
+            query_vector, k=self.config.dense_k or dense_k
+        )
+        return [self._to_candidate(doc) for doc in dense_docs]
+
+    def keyword_search(self, query: str, bm25_k: int) -> List["Candidate"]:
+        return [
+            Hit(self, i)
+            for i in self.bm25.search(query, self.config.bm25_k or bm25_k)
+        ]
+
+    def search(
+        self,
+        query: str,
+        query_vector: List[float],
+        dense_k: int,
+        bm25_k: int,
+    ) -> Tuple[List["Candidate"], List["Candidate"]]:
+        """
+        Returns (dense, keyword) candidate lists, each in rank order.
+        """
+        return (
+            self.dense_search(query_vector, dense_k),
+            self.keyword_search(query, bm25_k),
+        )
+
+
+class Hit(NamedTuple):
+    """A chunk of a specific collection, addressed by ID."""
+    collection: KnowledgeBase
+    chunk_id: int
+
 
+# A retrieval candidate is a chunk ID in a collection's ChunkStore.
+# Dense hits whose payload predates chunk IDs stay plain Documents.
+Candidate = Union[Hit, Document]
 
-PDF_PATH = "data/Ebook-Agentic-AI.pdf"
 
+def load_knowledge_base(config: CollectionConfig) -> KnowledgeBase:
+    """
+    Opens (or builds) the chunk store of the published corpus version of
+    a collection and indexes it.
+    """
+    published = read_corpus_version(config.qdrant_collection)
+    version = published.version if published else None
+    index_name = published.index_name if published else config.qdrant_collection
 
-# BM25 Singleton 
-# This global variable acts as a cache.
-# It ensures we only load and index the PDF once per application session.
-# Without this, Streamlit would reload the PDF on every interaction (slow!).
-_BM25 = None
+    print(f"📚 Loading collection '{config.name}' (version {version})...")
+    store = load_chunk_store(config.source_path, get_chunk_store_path(index_name))
+    return KnowledgeBase(
+        config,
+        store,
+        BM25Index(store),
+        get_vector_store(index_name),
+        version=version,
+        index_name=index_name,
+    )
 
 
-def get_bm25_retriever(dense_k: int = 10) -> BM25Retriever:
+class CorpusWatcher:
     """
-    Lazily initializes and caches the BM25 retriever.
-    Prevents repeated PDF loading & indexing (Streamlit-safe).
+    Hot-swaps loaded collections when a new corpus version is published.
+
+    The new version's chunk store and BM25 index are built in this
+    background thread while queries keep running on the current one; the
+    swap itself is a dict assignment in the registry. A collection has at
+    most two versions in memory: a newer version is only loaded once no
+    query uses the retired one any more.
+
+    Listeners registered with `on_corpus_swap` run after each swap; prefork
+    workers use this to be re-forked from the updated parent instead of
+    each reloading (and holding a private copy of) the new version.
     """
-    global _BM25
 
-    # Check if the retriever is already cached
-    if _BM25 is None:
-        # Load the PDF and split it into chunks
-        docs = load_and_split_pdf(PDF_PATH)
-        # Create the sparse index from the documents
-        _BM25 = BM25Retriever.from_documents(docs)
-        # Set the default number of documents to retrieve
-        _BM25.k = dense_k
+    def __init__(self, registry: CollectionRegistry, interval: float):
+        self.registry = registry
+        self.interval = interval
+        # Retired KnowledgeBase per collection, alive while queries use it
+        self._retired: Dict[str, weakref.ref] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="corpus-watcher", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Corpus reload failed: {e!r}")
+
+    def check(self) -> List[str]:
+        """
+        Reloads every loaded collection whose published version changed.
+        Returns the names of the swapped collections.
+        """
+        swapped = []
+        for name in self.registry.loaded():
+            current = self.registry.peek(name)
+            if current is None:
+                continue
+            published = read_corpus_version(current.config.qdrant_collection)
+            if published is None or published.version == current.version:
+                continue
+
+            retired = self._retired.get(name)
+            if retired is not None and retired() is not None:
+                # Queries still run on the previous version; a third
+                # copy would not fit. Retry on the next check.
+                continue
+
+            print(f"🔄 Loading version {published.version} of '{name}'...")
+            previous = self.registry.reload(name)
+            if previous is None:
+                continue
+
+            self._retired[name] = weakref.ref(previous)
+            if previous.index_name != published.index_name:
+                # Drop the cached vector store once the last query is done.
+                weakref.finalize(previous, release_vector_store, previous.index_name)
+            print(f"✅ '{name}' now serves version {published.version} "
+                  f"(was {previous.version}).")
+            swapped.append(name)
+
+        if swapped:
+            for listener in list(_SWAP_LISTENERS):
+                try:
+                    listener(swapped)
+                except Exception as e:
+                    print(f"⚠️ Corpus swap listener failed: {e!r}")
+
+        return swapped
+
+
+# Called with the swapped collection names after a CorpusWatcher swap.
+_SWAP_LISTENERS: List[Callable[[List[str]], None]] = []
+
+
+def on_corpus_swap(listener: Callable[[List[str]], None]) -> None:
+    _SWAP_LISTENERS.append(listener)
 
-    return _BM25
+
+# Collection Registry Singleton
+# Collections are loaded on first use and evicted LRU-style, so only
+# the knowledge bases that are actually queried occupy memory.
+_REGISTRY = None
+_WATCHER = None
+# False in processes that get new versions another way (prefork workers)
+_RELOADS_ENABLED = True
+
+
+def get_collection_registry() -> CollectionRegistry:
+    global _REGISTRY, _WATCHER
+
+    if _REGISTRY is None:
+        _REGISTRY = CollectionRegistry(
+            load_collection_configs(),
+            load_knowledge_base,
+            max_loaded=int(os.getenv("RAG_MAX_LOADED_COLLECTIONS", "8")),
+        )
+    if _WATCHER is None and _RELOADS_ENABLED and RAG_RELOAD_INTERVAL > 0:
+        _WATCHER = CorpusWatcher(_REGISTRY, RAG_RELOAD_INTERVAL)
+        _WATCHER.start()
+
+    return _REGISTRY
+
+
+# Fan-out executors shared by all queries (one task per collection):
+# dense searches (network) and local work (loads, BM25) are kept apart,
+# so a stalled vector backend cannot starve the BM25 fallback.
+_FANOUT = None
+_LOCAL = None
+
+
+def _get_fanout_executor() -> ThreadPoolExecutor:
+    global _FANOUT
+
+    if _FANOUT is None:
+        _FANOUT = ThreadPoolExecutor(
+            max_workers=int(os.getenv("RAG_FANOUT_WORKERS", "8")),
+            thread_name_prefix="rag-fanout",
+        )
+
+    return _FANOUT
+
+
+def _get_local_executor() -> ThreadPoolExecutor:
+    global _LOCAL
+
+    if _LOCAL is None:
+        _LOCAL = ThreadPoolExecutor(
+            max_workers=int(os.getenv("RAG_LOCAL_WORKERS", "8")),
+            thread_name_prefix="rag-local",
+        )
+
+    return _LOCAL
+
+
+def disable_reloads() -> None:
+    """
+    Stops watching for corpus versions in this process, e.g. in prefork
+    workers: the parent reloads once and forks new workers.
+    """
+    global _WATCHER, _RELOADS_ENABLED
+    _RELOADS_ENABLED = False
+    if _WATCHER is not None:
+        _WATCHER.stop()
+        _WATCHER = None
+
+
+def _reset_after_fork() -> None:
+    """
+    Threads (incl. the corpus watcher) do not survive fork and loaded
+    collections hold Qdrant connections of the parent; a forked worker
+    re-creates them lazily.
+    The loaded collections (chunk stores, BM25 indexes) and the models
+    are kept and shared copy-on-write.
+    """
+    global _WATCHER, _FANOUT, _LOCAL
+    _WATCHER = None
+    _FANOUT = None
+    _LOCAL = None
+
+    if _REGISTRY is not None:
+        _REGISTRY.reset_locks()
+        for name in _REGISTRY.loaded():
+            collection = _REGISTRY.peek(name)
+            if collection is not None:
+                collection.reconnect()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class BatchedReranker:
+    """
+    Cross-encoder whose `predict` calls from concurrent requests share
+    one forward pass (see app/rag/batcher.py).
+    """
+
+    def __init__(self, model: "CrossEncoder"):
+        self.model = model
+        self.batcher = DynamicBatcher(
+            # One model call for the whole combined batch.
+            lambda pairs: model.predict(pairs, batch_size=len(pairs)),
+            name="rerank",
+            max_batch_size=RERANK_MAX_BATCH_SIZE,
+        )
+
+    def predict(
+        self, pairs: List[Tuple[str, str]], deadline: Optional[float] = None
+    ) -> List[float]:
+        """Raises concurrent.futures.TimeoutError past the deadline."""
+        return self.batcher.submit(pairs, deadline)
+
+
+# Reranker Singleton
+# Loading the cross-encoder takes seconds; do it once per process
+# instead of once per HybridRetriever (i.e. once per query).
+_RERANKER = None
+
+
+def get_reranker() -> Union["CrossEncoder", BatchedReranker]:
+    """
+    Lazily initializes and caches the cross-encoder reranker.
+    """
+    global _RERANKER
+
+    if _RERANKER is None:
+        from sentence_transformers import CrossEncoder
+
+        _RERANKER = CrossEncoder(
+            "cross-encoder/ms-marco-MiniLM-L-6-v2",
+            max_length=512
+        )
+        if ENCODER_BATCHING:
+            _RERANKER = BatchedReranker(_RERANKER)
+
+    return _RERANKER
 
 
 # -----------------------------
@@ -53,95 +430,376 @@ def get_bm25_retriever(dense_k: int = 10) -> BM25Retriever:
 class HybridRetriever:
     """
     Hybrid Retrieval Strategy:
-    1. Fetch semantic matches using Qdrant (Dense).
-    2. Fetch keyword matches using BM25 (Sparse).
-    3. Deduplicate results (if the same doc appears in both).
-    4. Rerank the merged list using a Cross-Encoder for maximum relevance.
+    1. Embed the query once.
+    2. For every collection in parallel: fetch semantic matches using
+       Qdrant (Dense) and keyword matches using BM25 (Sparse).
+    3. Merge all candidate lists globally (Reciprocal Rank Fusion),
+       which also deduplicates chunks found by both retrievers.
+    4. Rerank the merged pool using a Cross-Encoder for maximum relevance.
     """
 
-    def __init__(self, dense_k: int = 15, final_k: int = 8):
+    def __init__(
+        self,
+        dense_k: int = 15,
+        final_k: int = 8,
+        collections: Optional[Iterable[str]] = None,
+        bm25_k: Optional[int] = None,
+        pool_size: int = 8,
+        rerank_chars: Optional[int] = None,
+        registry: Optional[CollectionRegistry] = None,
+        neighbour_tokens: int = 0,
+        expand_top: int = 3,
+    ):
         """
         Args:
-            dense_k (int): Number of docs to fetch from EACH retriever (Vector & BM25).
+            dense_k (int): Number of docs to fetch from the vector store per collection.
             final_k (int): Number of top-tier docs to return to the LLM.
+            collections (Iterable[str]): Collection names to search (default: all configured).
+            bm25_k (int): Number of docs to fetch from BM25 per collection (default: dense_k).
+            pool_size (int): Number of merged candidates passed to the reranker.
+            rerank_chars (int): Reranker input length (default: the length
+                precomputed at ingest time, loader.RERANK_CHARS).
+            registry (CollectionRegistry): Collections to use (default: the
+                process-wide registry).
+            neighbour_tokens (int): Token budget for neighbouring chunks
+                added to the top hits by `passages` (0 = none).
+            expand_top (int): Number of top hits that get neighbours.
         """
         self.dense_k = dense_k
+        self.bm25_k = bm25_k or dense_k
         self.final_k = final_k
+        self.pool_size = pool_size
+        self.rerank_chars = rerank_chars
+        self.neighbour_tokens = neighbour_tokens
+        self.expand_top = expand_top
 
-        # Dense retriever (vector store)
-        self.vector_store = get_vector_store()
+        self.registry = registry or get_collection_registry()
+        self.collections = list(collections or self.registry.names())
 
-        # Sparse retriever (cached BM25)
-        self.bm25 = get_bm25_retriever(dense_k)
+        # Query embedding model (shared by every collection)
+        self.embeddings = get_embeddings()
 
-        # Cross-encoder reranker
-        self.reranker = CrossEncoder(
-            "cross-encoder/ms-marco-MiniLM-L-6-v2",
-            max_length=512
-        )
+        # Cross-encoder reranker (cached)
+        self.reranker = get_reranker()
+
+        # Collections that timed out / failed during the last search,
+        # and degraded steps of the last search (see app/utils/deadline.py)
+        self.skipped: List[str] = []
+        self.degraded: List[str] = []
+        # Corpus version of every collection that answered the last search
+        self.versions: Dict[str, Optional[str]] = {}
 
     # -------------------------
     # Utilities
     # -------------------------
-    def _deduplicate(self, docs: List[Document]) -> List[Document]:
+    def text(self, candidate: Candidate) -> str:
+        if isinstance(candidate, Hit):
+            return candidate.collection.store.text(candidate.chunk_id)
+        return candidate.page_content
+
+    def context_text(self, candidate: Candidate) -> str:
+        """Cleaned prompt text (precomputed for stored chunks)."""
+        if isinstance(candidate, Hit):
+            return candidate.collection.store.context(candidate.chunk_id)
+        return (
+            candidate.metadata.get("context_text")
+            or clean_chunk(candidate.page_content)
+        )
+
+    def rerank_text(self, candidate: Candidate) -> str:
+        """Cross-encoder input (precomputed for stored chunks)."""
+        if self.rerank_chars not in (None, RERANK_CHARS):
+            return self.text(candidate)[: self.rerank_chars]
+        if isinstance(candidate, Hit):
+            return candidate.collection.store.rerank_text(candidate.chunk_id)
+        return (
+            candidate.metadata.get("rerank_text")
+            or candidate.page_content[:RERANK_CHARS]
+        )
+
+    def n_tokens(self, candidate: Candidate) -> int:
+        """LLM token count of the candidate's context text."""
+        if isinstance(candidate, Hit):
+            return candidate.collection.store.n_tokens(candidate.chunk_id)
+        return candidate.metadata.get("n_tokens", 0)
+
+    def passages(self, hits: List[Candidate]) -> List[List[Candidate]]:
         """
-        Removes duplicate documents from the combined list.
+        Groups the hits into prompt passages, one per hit, in hit order.
+
+        In stores of non-overlapping chunks (loader.link_neighbours), the
+        `expand_top` best hits grow by their neighbouring chunks, one chunk
+        per side and hit per round (nearest text first), while the added
+        tokens fit in `neighbour_tokens`. No chunk appears twice; each
+        passage is in document order.
         """
-        seen = set()
-        unique_docs = []
+        passages = [[hit] for hit in hits]
+        budget = self.neighbour_tokens
+        if budget <= 0:
+            return passages
+
+        seen = {(h.collection.name, h.chunk_id) for h in hits if isinstance(h, Hit)}
+        # Passage index -> [chunk before, chunk after] still to consider
+        open_ends = {
+            i: list(hit.collection.store.neighbours(hit.chunk_id))
+            for i, hit in enumerate(hits[: self.expand_top])
+            if isinstance(hit, Hit)
+        }
 
-        for doc in docs:
-            key = doc.page_content[:200]
-            if key not in seen:
-                seen.add(key)
-                unique_docs.append(doc)
+        while open_ends:
+            for i, ends in list(open_ends.items()):
+                collection = passages[i][0].collection
+                for side in (1, 0):
+                    chunk_id = ends[side]
+                    if chunk_id is None:
+                        continue
+                    cost = collection.store.n_tokens(chunk_id)
+                    if (collection.name, chunk_id) in seen or cost > budget:
+                        # Reached another hit, or out of budget on this side.
+                        ends[side] = None
+                        continue
 
-        return unique_docs
+                    budget -= cost
+                    seen.add((collection.name, chunk_id))
+                    if side:
+                        passages[i].append(Hit(collection, chunk_id))
+                    else:
+                        passages[i].insert(0, Hit(collection, chunk_id))
+                    ends[side] = collection.store.neighbours(chunk_id)[side]
+
+                if ends == [None, None]:
+                    del open_ends[i]
+
+        return passages
+
+    def documents(self, candidates: List[Candidate]) -> List[Document]:
+        """
+        Materializes Documents for the final hits only (the "edge").
+        """
+        docs = []
+        for candidate in candidates:
+            if isinstance(candidate, Hit):
+                doc = candidate.collection.store.document(candidate.chunk_id)
+                doc.metadata["collection"] = candidate.collection.name
+                doc.metadata["corpus_version"] = candidate.collection.version
+                docs.append(doc)
+            else:
+                docs.append(candidate)
+        return docs
+
+    def _fuse(self, ranked_lists: List[List[Candidate]]) -> List[Candidate]:
+        """
+        Merges ranked candidate lists with Reciprocal Rank Fusion and
+        removes duplicates. Hits are compared by (collection, chunk ID);
+        only when legacy Documents (no chunk ID) are mixed in do we fall
+        back to a text prefix.
+        """
+        by_text = any(
+            not isinstance(c, Hit) for ranked in ranked_lists for c in ranked
+        )
+        scores = {}
+        first_seen = {}
+
+        for ranked in ranked_lists:
+            for rank, candidate in enumerate(ranked):
+                if by_text:
+                    key = self.text(candidate)[:200]
+                else:
+                    key = (candidate.collection.name, candidate.chunk_id)
+                scores[key] = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+                first_seen.setdefault(key, candidate)
+
+        ordered = sorted(scores, key=scores.__getitem__, reverse=True)
+        return [first_seen[key] for key in ordered]
+
+    def _load(self, name: str, loaded_at: Dict[str, float]) -> KnowledgeBase:
+        """Resolves a collection and records when it was ready."""
+        collection = self.registry.get(name)
+        loaded_at[name] = time.monotonic()
+        return collection
+
+    def _embed_query(self, query: str, deadline: Optional[float]) -> List[float]:
+        if isinstance(self.embeddings, BatchedEmbeddings):
+            return self.embeddings.embed_query(query, deadline)
+        return self.embeddings.embed_query(query)
+
+    def _rerank_scores(
+        self, pairs: List[Tuple[str, str]], deadline: Optional[float]
+    ) -> List[float]:
+        if isinstance(self.reranker, BatchedReranker):
+            return self.reranker.predict(pairs, deadline)
+        return self.reranker.predict(pairs)
+
+    def _dense_search(
+        self, collection: Future, query_vector: List[float]
+    ) -> List[Candidate]:
+        return collection.result().dense_search(query_vector, self.dense_k)
+
+    def _keyword_search(self, collection: Future, query: str) -> List[Candidate]:
+        return collection.result().keyword_search(query, self.bm25_k)
+
+    def _fan_out(
+        self,
+        query: str,
+        query_vector: Optional[List[float]],
+        deadline: Optional[float] = None,
+    ) -> List[List[Candidate]]:
+        """
+        Queries every collection in parallel, honouring per-collection
+        timeouts. Dense (network) and BM25 (local) searches run as separate
+        tasks on separate executors: when only the dense search is late or
+        failing, the collection still contributes its BM25 results. Both
+        stop waiting at the deadline.
+
+        A collection's timeout starts once it is loaded, independently of
+        the other collections, so slow collections cost one timeout in
+        total. A cold load (first use, or after eviction) is bounded by the
+        deadline and RAG_LOAD_TIMEOUT only, so the first query to a
+        collection is not skipped for loading it.
+        """
+        executor = _get_fanout_executor()
+        local = _get_local_executor()
+        start = time.monotonic()
+        budget = time_left(deadline)
+        end = None if budget is None else start + budget
+        load_until = start + RAG_LOAD_TIMEOUT
+        if end is not None:
+            load_until = min(load_until, end)
+        loaded_at: Dict[str, float] = {}
+        futures = {}
+        for name in self.collections:
+            # Resolve (and, on first use, load) the collection once, inside
+            # the fan-out so collections load in parallel. Both searches
+            # use this copy, so they see the same corpus version even if a
+            # reload swaps it meanwhile. The local executor runs tasks in
+            # order: the BM25 search never starts before its load.
+            collection = local.submit(self._load, name, loaded_at)
+            futures[name] = (
+                collection,
+                # No query vector (embedding missed the deadline): BM25 only
+                None if query_vector is None
+                else executor.submit(self._dense_search, collection, query_vector),
+                local.submit(self._keyword_search, collection, query),
+            )
+
+        ranked_lists = []
+        errors = []
+
+        for name, (collection, dense_future, keyword_future) in futures.items():
+            if self._result(name, "Load", collection, load_until, errors) is None:
+                self.skipped.append(name)
+                continue
+
+            until = loaded_at[name] + self.registry.configs[name].timeout
+            if end is not None:
+                until = min(until, end)
+            dense = None
+            if dense_future is not None:
+                dense = self._result(name, "Dense", dense_future, until, errors)
+            keyword = self._result(name, "BM25", keyword_future, until, errors)
+
+            if dense is None and keyword is None:
+                self.skipped.append(name)
+                continue
+            if dense is None:
+                self.degraded.append(f"bm25_only:{name}")
+
+            self.versions[name] = collection.result().version
+            ranked_lists.extend(r for r in (dense, keyword) if r is not None)
+
+        # Surface the error if nothing could be searched at all.
+        if errors and not ranked_lists:
+            raise errors[0]
+
+        return ranked_lists
+
+    @staticmethod
+    def _result(
+        name: str, kind: str, future, until: Optional[float], errors: List
+    ) -> Optional[List[Candidate]]:
+        """
+        Waits for a fan-out task until `until` (None = no limit);
+        None if late or failed.
+        """
+        timeout = None if until is None else max(0.0, until - time.monotonic())
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeout:
+            print(f"⏱️ {kind} search of '{name}' timed out")
+        except Exception as e:
+            print(f"⚠️ {kind} search of '{name}' failed: {e!r}")
+            errors.append(e)
+        return None
 
     # -------------------------
     # Main Retrieval Logic
     # -------------------------
-    def retrieve(self, query: str) -> List[Document]:
+    def search(
+        self, query: str, deadline: Optional[float] = None
+    ) -> List[Candidate]:
         """
-        Executes hybrid retrieval + reranking.
+        Executes hybrid retrieval + reranking and returns chunk hits.
+
+        Flow: Query -> [Vector + BM25] x collections -> Fuse -> Rerank -> Top K
 
-        Flow: Query -> [Vector + BM25] -> Deduplicate -> Rerank -> Top K
+        Args:
+            query (str): User query.
+            deadline (float): Epoch time by which retrieval should finish.
+                Degraded steps are listed in `self.degraded` afterwards.
         """
+        self.skipped = []
+        self.degraded = []
+        self.versions = {}
 
-        # 1️ Dense semantic search
-        # Finds documents with similar embeddings (meaning).
-        dense_docs = self.vector_store.similarity_search(
-            query, k=self.dense_k
-        )
+        # 1️ Embed once; every collection reuses the same query vector.
+        # If the (batched) embedding misses the deadline, search BM25 only.
+        try:
+            query_vector = self._embed_query(query, deadline)
+        except FuturesTimeout:
+            query_vector = None
 
-        # 2️ Sparse keyword search (LangChain 0.2+ style)
-        # Finds documents with exact keyword matches.
-        keyword_docs = self.bm25.invoke(query)
+        # 2️ Dense + sparse search in every collection (parallel)
+        ranked_lists = self._fan_out(query, query_vector, deadline)
 
-        # 3️ Merge & deduplicate
-        docs = self._deduplicate(dense_docs + keyword_docs)
-        # Limit candidate pool to 8 docs to keep reranking fast
-        docs = docs[:8] 
+        # 3️ Global merge & deduplicate
+        candidates = self._fuse(ranked_lists)
+        # Limit candidate pool to keep reranking fast
+        candidates = candidates[: self.pool_size]
 
-        if not docs:
+        if not candidates:
             return []
 
+        left = time_left(deadline)
+        if left is not None and left < RAG_RERANK_MIN_TIME:
+            # Not enough time for the cross-encoder: keep the fused order.
+            self.degraded.append("rerank_skipped")
+            return candidates[: self.final_k]
+
         # 4️ Cross-encoder reranking
         # Prepare pairs: (Query, Document Text) for the model to score.
-        pairs = [(query, doc.page_content[:500]) for doc in docs]
+        pairs = [(query, self.rerank_text(c)) for c in candidates]
         # Predict relevance scores (higher is better)
-        scores = self.reranker.predict(pairs)
+        try:
+            scores = self._rerank_scores(pairs, deadline)
+        except FuturesTimeout:
+            # The shared cross-encoder was too busy: keep the fused order.
+            self.degraded.append("rerank_skipped")
+            return candidates[: self.final_k]
 
-        # Sort documents by their new scores in descending order
-        ranked_docs = [
-            doc for _, doc in sorted(
-                zip(scores, docs),
+        # Sort candidates by their new scores in descending order
+        ranked = [
+            c for _, c in sorted(
+                zip(scores, candidates),
                 key=lambda x: x[0],
                 reverse=True
             )
         ]
-        
-        # Return only the top 'final_k' most relevant docs
-        return ranked_docs[: self.final_k]
 
+        # Return only the top 'final_k' most relevant chunks
+        return ranked[: self.final_k]
 
+    def retrieve(self, query: str) -> List[Document]:
+        """
+        Executes hybrid retrieval + reranking and returns Documents.
+        """
+        return self.documents(self.search(query))
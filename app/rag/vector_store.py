@@ -6,77 +6,188 @@ It handles:
 1. Connecting to the Qdrant Cloud (or local instance).
 2. Creating the collection if it doesn't exist.
 3. Configuring vector parameters (Dimensions, Distance metric).
-4. Providing a singleton instance of the VectorStore for the rest of the app.
+4. Providing one cached VectorStore per collection for the rest of the app.
+
+With VECTOR_BACKEND=local, the same functions return an in-process
+index instead (app/rag/local_index.py): no server and no network round
+trip. It is persisted next to the chunk store (CHUNK_STORE_DIR).
 """
 
 import os
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, SparseVectorParams
-from langchain_qdrant import QdrantVectorStore
+import shutil
+import threading
+from typing import List
 from app.rag.embeddings import get_embeddings
 
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "qdrant").lower()
+
 _COLLECTION_NAME = "hybrid_rag_docs"
-_VECTOR_DIM = 384  
-_vector_store = None
+_VECTOR_DIM = 384
+_vector_stores = {}
+_client = None
+_lock = threading.Lock()
 
 
-def get_vector_store():
+def get_vector_store(collection_name: str = _COLLECTION_NAME):
     """
-    Initializes and returns the QdrantVectorStore instance.
-    Uses a singleton pattern to avoid re-connecting on every call.
+    Initializes and returns the QdrantVectorStore for a collection.
+    Uses a per-collection singleton to avoid re-connecting on every call.
     """
 
-    global _vector_store
-
     # Return cached instance if available
-    if _vector_store is not None:
-        return _vector_store
-    
-    # Fetch the embedding model (needed to convert text -> vectors)
-    embeddings = get_embeddings()
-    
-    # Initialize the low-level Qdrant Client
-    # This communicates with Qdrant Cloud cluster via API key.
-    client = QdrantClient(
-        url=os.getenv("QDRANT_URL"),
-        api_key=os.getenv("QDRANT_API_KEY"),
-    )
-
-    # client.delete_collection(collection_name=_COLLECTION_NAME)
-    # print("collection deleted")
-
-    # Create collection with BOTH dense & sparse vectors
-    if not client.collection_exists(_COLLECTION_NAME):
-        print("📁 Creating Qdrant hybrid collection...")
-
-        client.create_collection(
-            collection_name=_COLLECTION_NAME,
-            vectors_config={
-                "dense": VectorParams(
-                    size=_VECTOR_DIM,
-                    distance=Distance.COSINE,
-                )
-            }
-            # Note: We do NOT add sparse_vectors_config here because
-            # we are handling Sparse Search (BM25) locally in retriever.py
+    if collection_name in _vector_stores:
+        return _vector_stores[collection_name]
+
+    if VECTOR_BACKEND == "local":
+        return _get_local_vector_store(collection_name)
+    if VECTOR_BACKEND != "qdrant":
+        raise ValueError(
+            f"VECTOR_BACKEND must be 'qdrant' or 'local', got {VECTOR_BACKEND!r}"
+        )
+
+    from qdrant_client.models import Distance, VectorParams
+    from langchain_qdrant import QdrantVectorStore
+
+    with _lock:
+        if collection_name in _vector_stores:
+            return _vector_stores[collection_name]
+
+        # Fetch the embedding model (needed to convert text -> vectors)
+        embeddings = get_embeddings()
+
+        # Shared low-level Qdrant Client
+        # This communicates with Qdrant Cloud cluster via API key.
+        client = get_qdrant_client()
+
+        # Create collection with dense vectors
+        if not client.collection_exists(collection_name):
+            print(f"📁 Creating Qdrant collection '{collection_name}'...")
+
+            client.create_collection(
+                collection_name=collection_name,
+                vectors_config={
+                    "dense": VectorParams(
+                        size=_VECTOR_DIM,
+                        distance=Distance.COSINE,
+                    )
+                }
+                # Note: We do NOT add sparse_vectors_config here because
+                # we are handling Sparse Search (BM25) locally in retriever.py
+            )
+
+        _vector_stores[collection_name] = QdrantVectorStore(
+            client=client,
+            collection_name=collection_name,
+            embedding=embeddings,
+            vector_name="dense"
         )
 
-    _vector_store = QdrantVectorStore(
-        client=client,
-        collection_name=_COLLECTION_NAME,
-        embedding=embeddings,
-        vector_name="dense"
-    )
+    return _vector_stores[collection_name]
+
+
+def _get_local_vector_store(collection_name: str):
+    from app.rag.chunk_store import get_chunk_store_path
+    from app.rag.local_index import LocalVectorStore
+
+    with _lock:
+        if collection_name not in _vector_stores:
+            chunk_store_path = get_chunk_store_path(collection_name)
+            _vector_stores[collection_name] = LocalVectorStore(
+                get_embeddings(),
+                path=chunk_store_path + ".vectors",
+                chunk_store_path=chunk_store_path,
+            )
+
+    return _vector_stores[collection_name]
+
+
+def count_vectors(collection_name: str) -> int:
+    """
+    Number of vectors stored for a collection, on either backend.
+    """
+    if VECTOR_BACKEND == "local":
+        return len(get_vector_store(collection_name))
+
+    return get_qdrant_client().count(
+        collection_name=collection_name,
+        exact=True,
+    ).count
+
+
+def release_vector_store(collection_name: str) -> None:
+    """
+    Drops the cached store of a collection (e.g. a retired corpus version).
+    """
+    with _lock:
+        _vector_stores.pop(collection_name, None)
+
+
+def list_vector_indexes() -> List[str]:
+    """Names of all collections in the vector backend."""
+    if VECTOR_BACKEND == "local":
+        from app.rag.chunk_store import CHUNK_STORE_DIR
+
+        if not os.path.isdir(CHUNK_STORE_DIR):
+            return []
+        return [
+            entry[: -len(".vectors")]
+            for entry in os.listdir(CHUNK_STORE_DIR)
+            if entry.endswith(".vectors")
+        ]
+
+    return [c.name for c in get_qdrant_client().get_collections().collections]
 
-    return _vector_store
+
+def delete_vector_index(collection_name: str) -> None:
+    """Deletes a collection's vectors from the backend."""
+    release_vector_store(collection_name)
+
+    if VECTOR_BACKEND == "local":
+        from app.rag.chunk_store import get_chunk_store_path
+
+        shutil.rmtree(
+            get_chunk_store_path(collection_name) + ".vectors", ignore_errors=True
+        )
+        return
+
+    client = get_qdrant_client()
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
 
 
 def get_qdrant_client():
-    return QdrantClient(
-        url=os.getenv("QDRANT_URL"),
-        api_key=os.getenv("QDRANT_API_KEY"),
-    )
+    """
+    Returns the process-wide Qdrant client (one connection pool shared
+    by every collection).
+    """
+    global _client
+
+    if _client is None:
+        from qdrant_client import QdrantClient
+
+        _client = QdrantClient(
+            url=os.getenv("QDRANT_URL"),
+            api_key=os.getenv("QDRANT_API_KEY"),
+        )
+
+    return _client
 
 
 def get_collection_name():
     return _COLLECTION_NAME
+
+
+def _reset_after_fork() -> None:
+    """
+    A forked worker must not reuse the parent's HTTP connections;
+    it reconnects lazily on first use. Local indexes are in-process
+    (memory-mapped) and stay shared with the parent.
+    """
+    global _client, _lock
+    _client = None
+    if VECTOR_BACKEND != "local":
+        _vector_stores.clear()
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,87 @@
+"""
+Process Startup
+---------------
+One-time, per-process initialization of the pipeline:
+1. Ingestion check (Qdrant count + upload if empty), then loading the
+   configured collections (chunk store + BM25 index).
+2. Model loading (LLM, embeddings, reranker).
+3. Graph construction.
+4. Optional background warm-up query so the first real user
+   does not pay for lazy kernel / allocator initialization.
+
+`initialize()` is idempotent and thread-safe, so every entry point
+(API lifespan, Streamlit, scripts) can call it without coordinating.
+"""
+
+import threading
+import time
+
+WARM_UP_QUERY = "What is agentic AI?"
+
+_LOCK = threading.Lock()
+_INITIALIZED = False
+_WARM_UP_THREAD = None
+
+
+def initialize(warm_up: bool = True) -> None:
+    """
+    Loads everything the graph needs, exactly once per process.
+
+    Args:
+        warm_up (bool): Run a warm-up query in a background thread afterwards.
+    """
+    global _INITIALIZED
+
+    with _LOCK:
+        if not _INITIALIZED:
+            from app.rag.ingest import ingest_documents
+            from app.rag.embeddings import get_embeddings
+            from app.rag.retriever import get_collection_registry, get_reranker
+            from app.llm.llm_client import get_llm
+            from app.graph.graph import get_agent_graph
+
+            ingest_documents()
+            get_collection_registry().preload()
+            get_embeddings()
+            get_reranker()
+            get_llm()
+            get_agent_graph()
+            _INITIALIZED = True
+
+    if warm_up:
+        start_warm_up()
+
+
+def start_warm_up() -> threading.Thread:
+    """
+    Starts (at most once) a daemon thread that runs one query end to end.
+    """
+    global _WARM_UP_THREAD
+
+    with _LOCK:
+        if _WARM_UP_THREAD is None:
+            _WARM_UP_THREAD = threading.Thread(
+                target=_warm_up, name="warm-up", daemon=True
+            )
+            _WARM_UP_THREAD.start()
+
+    return _WARM_UP_THREAD
+
+
+def _warm_up() -> None:
+    from app.graph.graph import get_agent_graph
+
+    start = time.perf_counter()
+    try:
+        get_agent_graph().invoke({
+            "query": WARM_UP_QUERY,
+            "answer": None,
+            "source": None,
+            "context": None,
+        })
+    except Exception as e:
+        # Warm-up is best effort; real requests will surface real errors.
+        print(f"⚠️ Warm-up query failed: {e!r}")
+        return
+
+    print(f"🔥 Warm-up query finished in {time.perf_counter() - start:.1f}s")
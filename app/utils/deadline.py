@@ -0,0 +1,52 @@
+"""
+Request Deadlines
+-----------------
+Every request carries an absolute deadline (`state["deadline"]`, epoch
+seconds, so it stays valid across worker processes). It is set when the
+request is admitted, and each stage checks the time left and degrades
+instead of overrunning:
+
+    Stage       Degradation                                   Recorded as
+    router      keyword routing instead of the LLM            router_keyword
+    retrieval   BM25 only for a collection whose Qdrant       bm25_only:<name>
+                search (or the query embedding) is late
+                or failing
+    retrieval   fused order instead of cross-encoder rerank   rerank_skipped
+                (too little time left, or the shared
+                cross-encoder batch is late)
+    generation  cut off at the deadline (partial answer)      generation_cut
+    generation  top passage returned without an LLM call      generation_skipped
+    weather     API call bounded by the time left             weather_timeout
+
+Degradations are appended to `state["degraded"]` and returned by the API,
+so callers can tell a complete answer from a degraded one.
+"""
+
+import os
+import time
+from typing import Dict, Optional
+
+# Default end-to-end budget per request (seconds, 0 = no deadline).
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "30"))
+
+
+def new_deadline(timeout: Optional[float] = None) -> Optional[float]:
+    """
+    Absolute deadline `timeout` seconds from now (default REQUEST_TIMEOUT);
+    None when the timeout is 0.
+    """
+    timeout = REQUEST_TIMEOUT if timeout is None else timeout
+    return time.time() + timeout if timeout > 0 else None
+
+
+def time_left(deadline: Optional[float]) -> Optional[float]:
+    """Seconds until the deadline (never negative); None = unbounded."""
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.time())
+
+
+def degrade(state: Dict, reason: str) -> None:
+    """Records a degraded path in the state."""
+    state["degraded"] = [*(state.get("degraded") or []), reason]
+    print(f"⏱️ Degraded: {reason}")
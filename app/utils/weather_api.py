@@ -16,12 +16,13 @@ class WeatherAPIError(Exception):
     pass
 
 
-def fetch_weather(city: str) -> dict:
+def fetch_weather(city: str, timeout: float = 10) -> dict:
     """
     Fetches real-time weather data for a given city.
 
     Args:
         city (str): City name
+        timeout (float): Connect/read timeout in seconds
 
     Returns:
         dict: Structured weather information
@@ -39,10 +40,10 @@ def fetch_weather(city: str) -> dict:
     }
 
     try:
-        response = requests.get(url, params=params, timeout=10)
+        response = requests.get(url, params=params, timeout=timeout)
         response.raise_for_status()
     except requests.RequestException as e:
-        raise WeatherAPIError(f"Weather API request failed: {e}")
+        raise WeatherAPIError(f"Weather API request failed: {e}") from e
 
     data = response.json()
 
@@ -0,0 +1,143 @@
+"""
+Import-Time Benchmark
+---------------------
+Measures cold import cost of the app's entry modules using
+`python -X importtime`, and reports which heavy dependencies each one
+drags in. Each measurement runs in a fresh interpreter.
+
+Usage:
+    python benchmarks/import_time.py                # print table
+    python benchmarks/import_time.py --write        # update IMPORT_TIME.md
+    python benchmarks/import_time.py --max-ms 1000  # fail if any is slower
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "IMPORT_TIME.md")
+
+MODULES = [
+    "app.utils.weather_api",
+    "app.graph.graph",
+    "app.rag.retriever",
+    "app.startup",
+    "app.api.server",
+]
+
+HEAVY_MODULES = [
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "langchain_huggingface",
+    "langchain_qdrant",
+    "qdrant_client",
+    "langgraph",
+]
+
+
+def measure_import(module: str) -> int:
+    """
+    Returns the cumulative import time (microseconds) of `module`
+    as reported by `-X importtime` in a fresh interpreter.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines look like: "import time:   self | cumulative | name"
+    for line in reversed(result.stderr.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+
+    raise RuntimeError(f"No importtime entry for {module}")
+
+
+def heavy_modules_loaded(module: str) -> List[str]:
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return [m for m in result.stdout.strip().split(",") if m]
+
+
+def run(repeats: int) -> List[Dict]:
+    rows = []
+    for module in MODULES:
+        try:
+            timings = [measure_import(module) for _ in range(repeats)]
+            heavy = heavy_modules_loaded(module)
+        except (subprocess.CalledProcessError, RuntimeError) as e:
+            print(f"⚠️ Skipping {module}: {e}", file=sys.stderr)
+            continue
+
+        rows.append({
+            "module": module,
+            "median_ms": statistics.median(timings) / 1000,
+            "min_ms": min(timings) / 1000,
+            "heavy": heavy,
+        })
+    return rows
+
+
+def format_table(rows: List[Dict]) -> str:
+    lines = [
+        "| Module | Median (ms) | Min (ms) | Heavy deps loaded |",
+        "|---|---:|---:|---|",
+    ]
+    for row in rows:
+        lines.append(
+            f"| `{row['module']}` | {row['median_ms']:.0f} | "
+            f"{row['min_ms']:.0f} | {', '.join(row['heavy']) or '-'} |"
+        )
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None)
+    parser.add_argument("--write", action="store_true")
+    args = parser.parse_args()
+
+    rows = run(args.repeats)
+    table = format_table(rows)
+    print(table)
+
+    if args.write:
+        with open(RESULTS_PATH, "w") as f:
+            f.write("# Import-Time Benchmark\n\n")
+            f.write(
+                "Generated by `python benchmarks/import_time.py --write` "
+                f"(Python {sys.version.split()[0]}, {args.repeats} runs).\n\n"
+            )
+            f.write(table + "\n")
+
+    if args.max_ms is not None:
+        slow = [r for r in rows if r["median_ms"] > args.max_ms]
+        if slow:
+            print(f"❌ Over budget ({args.max_ms} ms): "
+                  f"{', '.join(r['module'] for r in slow)}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
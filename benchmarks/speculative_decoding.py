@@ -0,0 +1,278 @@
+"""
+Speculative Decoding Benchmark
+------------------------------
+Compares plain greedy decoding of the LLM against assisted decoding
+(prompt lookup and/or a draft model) on real RAG prompts.
+
+Reported per mode:
+- tokens/s and speedup vs. greedy
+- acceptance rate: accepted draft tokens / drafted tokens
+- tokens per target forward pass (1.0 for plain greedy)
+- whether the output is token-for-token identical to greedy
+
+Prompts are built exactly like rag_node builds them (hybrid retrieval +
+RAG_PROMPT), so this needs the same environment as the app (Qdrant, models).
+
+Usage:
+    python benchmarks/speculative_decoding.py \\
+        --questions "What is agentic AI?" "How do multi-agent systems coordinate?"
+    python benchmarks/speculative_decoding.py --questions-file questions.txt \\
+        --modes none prompt_lookup draft --max-new-tokens 256
+    python benchmarks/speculative_decoding.py --modes none prompt_lookup draft \\
+        --write                                 # update SPECULATIVE_DECODING.md
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJECT_ROOT)
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "SPECULATIVE_DECODING.md")
+
+from app.llm.llm_client import (  # noqa: E402
+    SPECULATIVE_MODES,
+    get_decoding_kwargs,
+    get_model_name,
+    get_tokenizer,
+    load_causal_lm,
+)
+
+DEFAULT_QUESTIONS = [
+    "What is agentic AI?",
+    "What are the core components of an agentic AI system?",
+    "How do multi-agent systems coordinate their work?",
+]
+
+
+class DecodingCounter:
+    """
+    Counts target-model forward passes and drafted tokens during generate().
+    """
+
+    def __init__(self):
+        self.target_forwards = 0
+        self.drafted = 0
+
+    @contextmanager
+    def attach(self, model):
+        from transformers.generation import candidate_generator
+
+        patched = {}
+        for name in ("AssistedCandidateGenerator", "PromptLookupCandidateGenerator"):
+            cls = getattr(candidate_generator, name, None)
+            if cls is None:
+                continue
+            patched[cls] = cls.get_candidates
+            cls.get_candidates = self._wrap(cls.get_candidates)
+
+        def on_forward(*_):
+            self.target_forwards += 1
+
+        handle = model.register_forward_hook(on_forward)
+        try:
+            yield self
+        finally:
+            handle.remove()
+            for cls, original in patched.items():
+                cls.get_candidates = original
+
+    def _wrap(self, get_candidates):
+        counter = self
+
+        def wrapped(generator, input_ids, *args, **kwargs):
+            result = get_candidates(generator, input_ids, *args, **kwargs)
+            candidate_ids = result[0]
+            counter.drafted += candidate_ids.shape[-1] - input_ids.shape[-1]
+            return result
+
+        return wrapped
+
+
+def build_prompts(questions: List[str]) -> List[str]:
+    from app.graph.rag_node import (
+        RAG_EXPAND_TOP,
+        RAG_NEIGHBOUR_TOKENS,
+        RAG_PROMPT,
+        build_context,
+    )
+    from app.rag.retriever import HybridRetriever
+
+    retriever = HybridRetriever(
+        neighbour_tokens=RAG_NEIGHBOUR_TOKENS, expand_top=RAG_EXPAND_TOP
+    )
+    return [
+        RAG_PROMPT.format(
+            context=build_context(retriever, retriever.passages(retriever.search(q))),
+            question=q,
+        )
+        for q in questions
+    ]
+
+
+def run_mode(model, tokenizer, prompts: List[str], mode: str,
+             max_new_tokens: int) -> Dict:
+    generate_kwargs = dict(
+        do_sample=False,
+        repetition_penalty=1.1,
+        pad_token_id=tokenizer.eos_token_id,
+        **get_decoding_kwargs(mode),
+    )
+
+    def generate(prompt: str, max_tokens: int):
+        inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        output = model.generate(
+            **inputs, max_new_tokens=max_tokens, **generate_kwargs
+        )
+        return output[0, inputs["input_ids"].shape[-1]:].tolist()
+
+    # Warm-up (kernels, allocator, draft model) outside the measurement.
+    generate(prompts[0], 8)
+
+    outputs, elapsed = [], 0.0
+    with DecodingCounter().attach(model) as counter:
+        for prompt in prompts:
+            start = time.perf_counter()
+            outputs.append(generate(prompt, max_new_tokens))
+            elapsed += time.perf_counter() - start
+
+    new_tokens = sum(len(o) for o in outputs)
+    # Every target forward yields one token of its own; anything beyond
+    # that was an accepted draft token.
+    accepted = new_tokens - counter.target_forwards
+
+    return {
+        "mode": mode,
+        "outputs": outputs,
+        "new_tokens": new_tokens,
+        "seconds": elapsed,
+        "tokens_per_s": new_tokens / elapsed if elapsed else 0.0,
+        "tokens_per_forward": new_tokens / max(1, counter.target_forwards),
+        "acceptance_rate": accepted / counter.drafted if counter.drafted else None,
+    }
+
+
+def format_table(results: List[Dict]) -> str:
+    baseline = next((r for r in results if r["mode"] == "none"), None)
+    lines = [
+        "| Mode | Tokens | Tokens/s | Speedup | Acceptance | Tokens/forward | Identical to greedy |",
+        "|---|---:|---:|---:|---:|---:|---|",
+    ]
+    for r in results:
+        speedup = (
+            f"{r['tokens_per_s'] / baseline['tokens_per_s']:.2f}x"
+            if baseline and baseline["tokens_per_s"] else "-"
+        )
+        acceptance = (
+            f"{r['acceptance_rate']:.1%}" if r["acceptance_rate"] is not None else "-"
+        )
+        identical = (
+            ("yes" if r["outputs"] == baseline["outputs"] else "NO")
+            if baseline else "-"
+        )
+        lines.append(
+            f"| {r['mode']} | {r['new_tokens']} | {r['tokens_per_s']:.2f} | "
+            f"{speedup} | {acceptance} | {r['tokens_per_forward']:.2f} | {identical} |"
+        )
+    return "\n".join(lines)
+
+
+def describe_setup(modes: List[str], questions: List[str],
+                   max_new_tokens: int) -> List[str]:
+    """Hardware, software and models behind a run, as markdown bullets."""
+    import torch
+    import transformers
+
+    if torch.cuda.is_available():
+        device = f"GPU {torch.cuda.get_device_name(0)} (fp16)"
+    else:
+        device = (
+            f"CPU {platform.processor() or platform.machine()}, "
+            f"{os.cpu_count()} cores (fp32)"
+        )
+
+    lines = [
+        f"- Hardware: {device}",
+        f"- Software: Python {sys.version.split()[0]}, torch {torch.__version__}, "
+        f"transformers {transformers.__version__}",
+        f"- Target model: `{get_model_name()}`",
+    ]
+    if "draft" in modes:
+        lines.append(
+            f"- Draft model: `{os.getenv('LLM_DRAFT_MODEL', 'Qwen/Qwen2.5-0.5B-Instruct')}`"
+        )
+    if "prompt_lookup" in modes:
+        lines.append(
+            "- Prompt lookup: "
+            f"{get_decoding_kwargs('prompt_lookup')['prompt_lookup_num_tokens']} tokens"
+        )
+    lines.append(
+        f"- Workload: {len(questions)} RAG questions, greedy, "
+        f"max {max_new_tokens} new tokens"
+    )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Speculative decoding benchmark")
+    parser.add_argument("--questions", nargs="*", default=None)
+    parser.add_argument("--questions-file")
+    parser.add_argument("--modes", nargs="*", default=["none", "prompt_lookup"],
+                        choices=SPECULATIVE_MODES)
+    parser.add_argument("--max-new-tokens", type=int, default=256)
+    parser.add_argument("--out", help="Write results (without outputs) as JSON")
+    parser.add_argument("--write", action="store_true",
+                        help=f"Update {os.path.basename(RESULTS_PATH)}")
+    args = parser.parse_args()
+
+    questions = args.questions or DEFAULT_QUESTIONS
+    if args.questions_file:
+        with open(args.questions_file) as f:
+            questions = [line.strip() for line in f if line.strip()]
+
+    # Greedy first: it is the reference for the identity check.
+    modes = ["none"] + [m for m in args.modes if m != "none"]
+
+    prompts = build_prompts(questions)
+    tokenizer = get_tokenizer()
+    model = load_causal_lm(get_model_name())
+
+    results = []
+    for mode in modes:
+        print(f"⏱️ Running {mode}...")
+        results.append(
+            run_mode(model, tokenizer, prompts, mode, args.max_new_tokens)
+        )
+
+    table = format_table(results)
+    print()
+    print(table)
+
+    if args.write:
+        setup = describe_setup(modes, questions, args.max_new_tokens)
+        with open(RESULTS_PATH, "w") as f:
+            f.write("# Speculative Decoding Benchmark\n\n")
+            f.write(
+                "Generated by `python benchmarks/speculative_decoding.py "
+                f"--modes {' '.join(modes)} --write`.\n\n"
+            )
+            f.write("\n".join(setup) + "\n\n")
+            f.write(table + "\n")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(
+                [{k: v for k, v in r.items() if k != "outputs"} for r in results],
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
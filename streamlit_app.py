@@ -2,14 +2,96 @@
 Streamlit UI
 ------------
 A simple chat interface to interact with the agentic AI pipeline.
+
+The UI is a thin client: all models and the agent graph live in the
+inference API (see app/api/server.py), reachable at INFERENCE_API_URL.
+
+Set INFERENCE_MODE=embedded to run the graph inside the Streamlit server
+instead (single-process demos). Either way, Streamlit re-executes this
+script on every interaction, so all setup lives behind st.cache_resource
+and runs once per server process, not once per chat turn.
 """
 
+import os
+import requests
 import streamlit as st
-from app.graph.graph import agent_graph
-from app.evaluation.langsmith_eval import trace_agent_response
-from app.rag.ingest import ingest_documents
 
-ingest_documents()
+INFERENCE_API_URL = os.getenv("INFERENCE_API_URL", "http://localhost:8000")
+INFERENCE_MODE = os.getenv("INFERENCE_MODE", "api")
+REQUEST_TIMEOUT = float(os.getenv("INFERENCE_API_TIMEOUT", "300"))
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Keeps a pooled HTTP connection to the API across reruns."""
+    return requests.Session()
+
+
+@st.cache_resource(show_spinner="Loading models...")
+def load_embedded_pipeline():
+    """
+    Startup hook for embedded mode: ingestion check, model loading and
+    graph construction run once, then a warm-up query runs in background.
+    """
+    from app.startup import initialize
+    from app.graph.graph import get_agent_graph
+
+    initialize(warm_up=True)
+    return get_agent_graph()
+
+
+def ask_embedded(query: str) -> dict:
+    from app.evaluation.langsmith_eval import trace_agent_response
+
+    agent_graph = load_embedded_pipeline()
+    result_state = agent_graph.invoke({
+        "query": query,
+        "answer": None,
+        "source": None,
+        "context": None
+    })
+
+    # Trace with LangSmith
+    trace_agent_response(result_state)
+    return result_state
+
+
+def ask_agent(query: str) -> dict:
+    """
+    Sends the query to the inference API.
+    Busy / not-ready responses are turned into a friendly answer.
+    """
+    if INFERENCE_MODE == "embedded":
+        return ask_embedded(query)
+
+    try:
+        response = get_session().post(
+            f"{INFERENCE_API_URL}/v1/query",
+            json={"query": query},
+            timeout=REQUEST_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        return {"answer": f"Inference service unreachable: {e}", "source": "error"}
+
+    if response.status_code == 429:
+        return {
+            "answer": "The assistant is busy right now. Please try again in a moment.",
+            "source": "busy",
+        }
+    if response.status_code == 503:
+        return {
+            "answer": "The assistant is still starting up. Please try again shortly.",
+            "source": "unavailable",
+        }
+
+    if not response.ok:
+        return {
+            "answer": f"The assistant failed to answer (HTTP {response.status_code}). "
+                      "Please try again.",
+            "source": "error",
+        }
+    return response.json()
+
 
 st.set_page_config(
     page_title="Agentic Hybrid RAG Demo",
@@ -18,6 +100,9 @@ st.set_page_config(
 
 st.title("🤖 LangGraph Agentic RAG & Weather Assistant")
 
+if INFERENCE_MODE == "embedded":
+    load_embedded_pipeline()
+
 st.markdown(
     """
 Ask me:
@@ -46,26 +131,21 @@ if user_query:
     with st.chat_message("user"):
         st.markdown(user_query)
 
-    # Invoke agent
+    # Invoke agent (via the inference API)
     with st.chat_message("assistant"):
         with st.spinner("Thinking..."):
-            state = {
-                "query": user_query,
-                "answer": None,
-                "source": None,
-                "context": None
-            }
-
-            result_state = agent_graph.invoke(state)
-
-            # Trace with LangSmith
-            trace_agent_response(result_state)
+            result = ask_agent(user_query)
 
-            answer = result_state.get("answer", "No answer generated.")
-            source = result_state.get("source", "unknown")
+            answer = result.get("answer") or "No answer generated."
+            source = result.get("source") or "unknown"
 
             st.markdown(answer)
             st.caption(f"Source: `{source}`")
+            if result.get("degraded"):
+                st.caption(
+                    "⏱️ Answered under time pressure: "
+                    + ", ".join(result["degraded"])
+                )
 
     # Save assistant response
     st.session_state.messages.append(
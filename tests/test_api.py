@@ -0,0 +1,224 @@
+"""
+Test Inference API
+------------------
+Tests admission control and HTTP endpoints without loading any models.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import server
+from app.evaluation import profiling
+from app.api.prefork import PreforkWorkers, stream_in_worker
+from app.api.worker_pool import InferencePool, QueueFullError
+
+
+def _wait_until_ready(client: TestClient) -> None:
+    for _ in range(100):
+        if client.get("/readyz").status_code == 200:
+            return
+        time.sleep(0.01)
+    raise AssertionError("service never became ready")
+
+
+def test_pool_rejects_when_full():
+    """
+    Once workers and queue slots are taken, submit fails fast.
+    """
+
+    async def scenario():
+        pool = InferencePool(workers=1, queue_size=1)
+        release = threading.Event()
+
+        first = pool.submit(release.wait)
+        second = pool.submit(release.wait)
+
+        with pytest.raises(QueueFullError):
+            pool.submit(release.wait)
+
+        release.set()
+        await asyncio.gather(first, second)
+
+        with pytest.raises(ZeroDivisionError):
+            await pool.run(lambda: 1 / 0)
+
+        stats = pool.stats()
+        assert stats["rejected"] == 1
+        assert stats["in_flight"] == 0
+        assert stats["completed"] == 2
+        assert stats["failed"] == 1
+        pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_query_endpoint_returns_answer(mocker, monkeypatch):
+    """
+    Health, readiness and query endpoints work once startup completes.
+    """
+
+    mocker.patch.object(server, "_load_pipeline")
+    mocker.patch.object(
+        server,
+        "_invoke_graph",
+        return_value={"answer": "It is sunny.", "source": "weather_api",
+                      "route": "weather", "context": []},
+    )
+
+    with TestClient(server.app) as client:
+        assert client.get("/healthz").status_code == 200
+        _wait_until_ready(client)
+
+        response = client.post("/v1/query", json={"query": "Weather in Delhi?"})
+        no_time = client.post("/v1/query", json={"query": "hi", "timeout": 0})
+        denied_profile = client.post(
+            "/v1/query", json={"query": "hi"}, headers={"X-Profile": "stack"}
+        )
+        monkeypatch.setattr(profiling, "PROFILE_ALLOW_REQUESTS", True)
+        bad_profile = client.post(
+            "/v1/query", json={"query": "hi"}, headers={"X-Profile": "gdb"}
+        )
+
+    assert response.status_code == 200
+    assert no_time.status_code == 422
+    assert denied_profile.status_code == 403
+    assert bad_profile.status_code == 400
+    assert response.json()["answer"] == "It is sunny."
+
+
+def test_query_endpoint_returns_429_when_busy(mocker):
+    """
+    A saturated pool maps to HTTP 429 with a Retry-After header.
+    """
+
+    mocker.patch.object(server, "_load_pipeline")
+
+    with TestClient(server.app) as client:
+        _wait_until_ready(client)
+        mocker.patch.object(
+            client.app.state.pool, "submit", side_effect=QueueFullError("full")
+        )
+
+        response = client.post("/v1/query", json={"query": "hello"})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+
+
+def _fake_stream(query, emit, profile=None, deadline=None):
+    emit({"event": "answer", "answer": query.upper(), "pid": os.getpid()})
+    emit(None)
+
+
+def test_prefork_workers_run_jobs_and_stream(monkeypatch):
+    """
+    Forked workers execute jobs and stream events back to the parent.
+    """
+
+    monkeypatch.setattr(server, "_stream_graph", _fake_stream)
+    workers = PreforkWorkers(workers=2, warm_up=False)
+
+    try:
+        assert len(workers.pids()) == 2
+        assert os.getpid() not in workers.pids()
+
+        events, done = [], threading.Event()
+        stream_id = workers.open_stream(
+            lambda e: events.append(e) if e is not None else done.set()
+        )
+        workers.submit(stream_in_worker, stream_id, "hi").result()
+
+        assert done.wait(5)
+        assert events[0]["answer"] == "HI"
+        assert events[0]["pid"] in workers.pids()
+    finally:
+        workers.shutdown()
+
+
+def test_prefork_workers_replace_a_dead_worker():
+    """
+    A crashed worker breaks the process pool; new workers are forked in
+    the background instead of failing forever.
+    """
+
+    workers = PreforkWorkers(workers=1, warm_up=False)
+
+    try:
+        old_pids = workers.pids()
+        with pytest.raises(BrokenProcessPool):
+            workers.submit(os._exit, 1).result()
+
+        for _ in range(100):
+            if workers.restarts == 1 and not workers.broken:
+                break
+            time.sleep(0.05)
+
+        assert workers.restarts == 1
+        pid = workers.submit(os.getpid).result()
+        assert pid in workers.pids()
+        assert pid not in old_pids
+    finally:
+        workers.shutdown()
+
+
+def test_prefork_refork_lets_running_jobs_finish():
+    """
+    After a corpus swap the workers are re-forked from the parent; a job
+    already running completes on its old worker.
+    """
+
+    workers = PreforkWorkers(workers=1, warm_up=False)
+
+    try:
+        old_pids = workers.pids()
+        running = workers.submit(_sleep_and_get_pid, 0.5)
+        time.sleep(0.1)
+
+        workers.refork()
+
+        assert running.result(timeout=5) in old_pids
+        new_pid = workers.submit(os.getpid).result(timeout=5)
+        assert new_pid not in old_pids
+        assert workers.reforks == 1
+    finally:
+        workers.shutdown()
+
+
+def _sleep_and_get_pid(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+def test_stream_ends_when_its_worker_job_fails():
+    """
+    A stream whose job dies before finishing it still gets an error event
+    and its end, instead of hanging.
+    """
+
+    class FakePrefork:
+        def __init__(self):
+            self.open = True
+
+        def close_stream(self, stream_id):
+            was_open, self.open = self.open, False
+            return was_open
+
+    async def scenario():
+        events = []
+        prefork = FakePrefork()
+        future = asyncio.get_running_loop().create_future()
+        server._end_stream_on_failure(future, prefork, 7, events.append)
+        future.set_exception(BrokenProcessPool("worker died"))
+        await asyncio.sleep(0)
+        return events, prefork
+
+    events, prefork = asyncio.run(scenario())
+
+    assert events == [{"event": "error", "detail": "worker died"}, None]
+    assert not prefork.open
@@ -0,0 +1,123 @@
+"""
+Test Dynamic Batcher
+--------------------
+Tests that concurrent encoder calls are combined into shared batches and
+that every caller gets back exactly its own results.
+"""
+
+import gc
+import threading
+import time
+from concurrent.futures import TimeoutError as FuturesTimeout
+
+import pytest
+
+from app.rag.batcher import DynamicBatcher, batcher_stats
+
+
+def test_concurrent_requests_share_batches():
+    """
+    Requests arriving within the wait window run as one model call.
+    """
+
+    calls = []
+
+    def score(items):
+        calls.append(len(items))
+        return [item * 10 for item in items]
+
+    batcher = DynamicBatcher(score, name="test-share", max_batch_size=64, max_wait_ms=200)
+    barrier = threading.Barrier(8)
+    results = {}
+
+    def caller(i):
+        barrier.wait()
+        results[i] = batcher.submit([i, i + 100])
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: [i * 10, (i + 100) * 10] for i in range(8)}
+    assert sum(calls) == 16
+    assert len(calls) < 8
+
+    stats = batcher.stats()
+    assert stats["requests"] == 8
+    assert stats["batches"] == len(calls)
+    assert stats["items"] == 16
+    assert 0 <= stats["queue_ms"]["p50"] <= stats["queue_ms"]["max"]
+
+
+def test_batch_errors_reach_every_caller():
+    """
+    A failing model call raises in the callers instead of hanging them.
+    """
+
+    def broken(items):
+        raise RuntimeError("model crashed")
+
+    batcher = DynamicBatcher(broken, name="test-error", max_wait_ms=0)
+
+    with pytest.raises(RuntimeError, match="model crashed"):
+        batcher.submit(["query"])
+
+    assert batcher.submit([]) == []
+
+
+def test_submit_stops_waiting_at_the_deadline():
+    """
+    A caller whose batch is late gets a timeout at its deadline, and its
+    still-queued request is dropped instead of being computed.
+    """
+
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow(items):
+        calls.append(list(items))
+        started.set()
+        release.wait(5)
+        return items
+
+    batcher = DynamicBatcher(slow, name="test-deadline", max_wait_ms=0)
+    blocker = threading.Thread(target=batcher.submit, args=(["first"],))
+    blocker.start()
+    assert started.wait(5)
+
+    start = time.monotonic()
+    with pytest.raises(FuturesTimeout):
+        batcher.submit(["late"], deadline=time.time() + 0.1)
+    assert time.monotonic() - start < 1
+
+    release.set()
+    blocker.join()
+    assert batcher.submit(["next"]) == ["next"]
+    assert calls == [["first"], ["next"]]
+
+
+def test_closed_or_collected_batchers_stop_their_thread():
+    """
+    The worker thread does not keep its batcher alive: it exits on
+    close() and when the batcher is garbage collected.
+    """
+
+    closed = DynamicBatcher(lambda items: items, name="test-close", max_wait_ms=0)
+    assert closed.submit([1]) == [1]
+    thread = closed._thread
+    closed.close()
+    thread.join(5)
+    assert not thread.is_alive()
+    with pytest.raises(RuntimeError, match="closed"):
+        closed.submit([1])
+
+    dropped = DynamicBatcher(lambda items: items, name="test-gc", max_wait_ms=0)
+    assert dropped.submit([1]) == [1]
+    thread = dropped._thread
+    del dropped
+    gc.collect()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert "test-gc" not in batcher_stats()
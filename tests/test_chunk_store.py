@@ -0,0 +1,140 @@
+"""
+Test Chunk Store
+----------------
+Tests the compact, memory-mapped chunk store, the ID-based BM25 index
+and neighbour expansion of non-overlapping chunks.
+"""
+
+from langchain_core.documents import Document
+from app.rag import retriever as retriever_module
+from app.rag.chunk_store import ChunkStore
+from app.rag.collection_registry import CollectionConfig, CollectionRegistry
+from app.rag.loader import add_derived_fields, split_documents
+from app.rag.retriever import BM25Index, Hit, HybridRetriever, KnowledgeBase
+
+
+def _count_words(text: str) -> int:
+    # Stand-in for the LLM tokenizer, keeps the tests model-free.
+    return len(text.split())
+
+
+def _documents():
+    docs = [
+        Document(page_content="LangGraph enables agentic workflows.",
+                 metadata={"source": "a.pdf", "page": 0}),
+        Document(page_content="Qdrant is a vector database für embeddings.",
+                 metadata={"source": "a.pdf", "page": 0}),
+        Document(page_content="Hybrid RAG combines retrieval and generation.",
+                 metadata={"source": "a.pdf", "page": 1}),
+    ]
+    return add_derived_fields(docs, count_tokens=_count_words)
+
+
+def test_store_round_trips_through_disk(tmp_path):
+    """
+    Saved stores re-open memory-mapped with identical texts and metadata.
+    """
+
+    ChunkStore.from_documents(_documents()).save(str(tmp_path))
+    store = ChunkStore.open(str(tmp_path))
+
+    assert len(store) == 3
+    assert store.text(1) == "Qdrant is a vector database für embeddings."
+    assert store.metadata(2) == {"source": "a.pdf", "page": 1, "chunk_id": 2}
+
+    doc = store.document(0)
+    assert isinstance(doc, Document)
+    assert doc.page_content == "LangGraph enables agentic workflows."
+
+
+def test_store_keeps_precomputed_fields(tmp_path):
+    """
+    Ingest-time fields survive the round trip and stay out of the metadata.
+    """
+
+    doc = Document(
+        page_content="12 AGENTIC AI FOR EXECUTIVES\nAgents plan, act and reflect.\n7",
+        metadata={"source": "a.pdf", "page": 3},
+    )
+    add_derived_fields([doc], count_tokens=_count_words)
+    ChunkStore.from_documents([doc]).save(str(tmp_path))
+    store = ChunkStore.open(str(tmp_path))
+
+    assert store.context(0) == "Agents plan, act and reflect."
+    assert store.rerank_text(0) == doc.page_content[:500]
+    assert store.n_tokens(0) == 5
+    assert store.bm25_tokens(0) == [
+        "12", "agentic", "ai", "for", "executives",
+        "agents", "plan", "act", "and", "reflect", "7",
+    ]
+    assert "context_text" not in store.metadata(0)
+    assert store.metadata(0, with_derived=True)["n_tokens"] == 5
+
+
+def test_store_shares_identical_metadata():
+    """
+    Chunks with identical metadata share a single table entry.
+    """
+
+    store = ChunkStore.from_documents(_documents())
+
+    assert len(store._metadata) == 2
+    # Returned dicts are copies, so callers cannot corrupt the table.
+    store.metadata(0)["page"] = 99
+    assert store.metadata(1)["page"] == 0
+
+
+def test_bm25_index_returns_chunk_ids():
+    """
+    BM25 search returns integer chunk IDs ranked by keyword match.
+    """
+
+    index = BM25Index(ChunkStore.from_documents(_documents()))
+
+    assert index.search("Hybrid RAG retrieval", k=1) == [2]
+
+
+def test_non_overlapping_chunks_link_and_expand(tmp_path, monkeypatch):
+    """
+    Without overlap, chunks record their neighbours (across pages of the
+    same source), and the top hits are expanded with them within budget.
+    """
+
+    pages = [
+        Document(
+            page_content=". ".join(f"Sentence {i} on page {p}" for i in range(4)),
+            metadata={"source": "a.pdf", "page": p},
+        )
+        for p in range(2)
+    ]
+    chunks = split_documents(pages, chunk_size=40, chunk_overlap=0, derive_fields=False)
+    add_derived_fields(chunks, count_tokens=_count_words)
+    ChunkStore.from_documents(chunks).save(str(tmp_path))
+    store = ChunkStore.open(str(tmp_path))
+
+    n = len(store)
+    assert n >= 6
+    assert store.neighbours(0) == (None, 1)
+    assert store.neighbours(n - 1) == (n - 2, None)
+    # Links live in their own columns, not in the shared metadata table.
+    assert store.metadata(1) == {"source": "a.pdf", "page": 0, "chunk_id": 1}
+    assert ChunkStore.from_documents(_documents()).neighbours(0) == (None, None)
+
+    monkeypatch.setattr(retriever_module, "get_embeddings", lambda: None)
+    monkeypatch.setattr(retriever_module, "get_reranker", lambda: None)
+    config = CollectionConfig("a", "a", "a.pdf")
+    kb = KnowledgeBase(config, store, BM25Index(store), vector_store=None)
+    registry = CollectionRegistry({"a": config}, lambda _: kb)
+    hits = [Hit(kb, 3), Hit(kb, 5)]
+
+    def passages(budget):
+        retriever = HybridRetriever(
+            registry=registry, neighbour_tokens=budget, expand_top=1
+        )
+        return [[c.chunk_id for c in p] for p in retriever.passages(hits)]
+
+    assert passages(0) == [[3], [5]]
+    # One round: the chunk after, then the one before.
+    assert passages(store.n_tokens(4) + store.n_tokens(2)) == [[2, 3, 4], [5]]
+    # Expansion stops at other hits and at the start of the source.
+    assert passages(10_000) == [[0, 1, 2, 3, 4], [5]]
@@ -0,0 +1,380 @@
+"""
+Test Multi-Collection Retrieval
+-------------------------------
+Tests on-demand loading / eviction of collections and the parallel
+fan-out + global merge in HybridRetriever, using fake models.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.documents import Document
+from app.rag import retriever as retriever_module
+from app.rag.chunk_store import ChunkStore
+from app.rag.collection_registry import CollectionConfig, CollectionRegistry
+from app.rag.corpus_version import CorpusVersion
+from app.rag.loader import add_derived_fields
+from app.rag.retriever import (
+    BatchedReranker,
+    BM25Index,
+    CorpusWatcher,
+    HybridRetriever,
+    KnowledgeBase,
+)
+
+
+class FakeVectorStore:
+    def __init__(self, store, delay=0.0):
+        self.store = store
+        self.delay = delay
+
+    def similarity_search_by_vector(self, vector, k):
+        time.sleep(self.delay)
+        return self.store.documents(range(min(k, len(self.store))))
+
+
+class FakeEmbeddings:
+    def embed_query(self, text):
+        return [0.0]
+
+
+class FakeReranker:
+    def predict(self, pairs):
+        # Prefer passages sharing more words with the query.
+        return [
+            len(set(q.lower().split()) & set(p.lower().split()))
+            for q, p in pairs
+        ]
+
+
+def _store(*texts):
+    docs = [Document(page_content=t, metadata={}) for t in texts]
+    add_derived_fields(docs, count_tokens=lambda t: len(t.split()))
+    return ChunkStore.from_documents(docs)
+
+
+def test_registry_loads_on_demand_and_evicts_lru():
+    """
+    Collections load on first use; the least recently used is evicted.
+    """
+
+    configs = {
+        name: CollectionConfig(name, name, f"{name}.pdf")
+        for name in ("a", "b", "c")
+    }
+    loads = []
+    registry = CollectionRegistry(
+        configs, lambda cfg: loads.append(cfg.name) or cfg.name, max_loaded=2
+    )
+
+    assert registry.loaded() == []
+    registry.get("a")
+    registry.get("b")
+    registry.get("a")          # "b" is now least recently used
+    registry.get("c")
+
+    assert loads == ["a", "b", "c"]
+    assert registry.loaded() == ["a", "c"]
+
+
+def test_retriever_merges_collections_and_skips_slow_ones(monkeypatch):
+    """
+    Candidates from all collections are merged before reranking;
+    a collection whose dense search exceeds its timeout is not awaited
+    and contributes its BM25 results only.
+    """
+
+    stores = {
+        "hr": _store("Vacation policy allows 25 days per year."),
+        "eng": _store("Deploy policy requires two reviewers."),
+        "slow": _store("Vacation policy from the slow archive."),
+    }
+    configs = {
+        name: CollectionConfig(
+            name, name, f"{name}.pdf", timeout=0.2 if name == "slow" else 5.0
+        )
+        for name in stores
+    }
+
+    def loader(config):
+        store = stores[config.name]
+        delay = 1.0 if config.name == "slow" else 0.0
+        return KnowledgeBase(
+            config, store, BM25Index(store), FakeVectorStore(store, delay)
+        )
+
+    registry = CollectionRegistry(configs, loader)
+    monkeypatch.setattr(retriever_module, "get_collection_registry", lambda: registry)
+    monkeypatch.setattr(retriever_module, "get_embeddings", FakeEmbeddings)
+    monkeypatch.setattr(retriever_module, "get_reranker", FakeReranker)
+
+    retriever = HybridRetriever(dense_k=2, final_k=2)
+    start = time.monotonic()
+    docs = retriever.retrieve("vacation policy")
+
+    assert time.monotonic() - start < 0.9
+    assert retriever.skipped == []
+    assert retriever.degraded == ["bm25_only:slow"]
+    assert {d.metadata["collection"] for d in docs} == {"hr", "slow"}
+
+
+def test_cold_load_does_not_count_against_the_timeout(monkeypatch):
+    """
+    A collection that is slower to load than its search timeout is still
+    searched on first use (up to RAG_LOAD_TIMEOUT); preload() loads the
+    configured collections.
+    """
+
+    store = _store("Vacation policy allows 25 days per year.")
+    configs = {"hr": CollectionConfig("hr", "hr", "hr.pdf", timeout=0.2)}
+
+    def loader(config):
+        time.sleep(0.4)
+        return KnowledgeBase(config, store, BM25Index(store), FakeVectorStore(store))
+
+    registry = CollectionRegistry(configs, loader)
+    monkeypatch.setattr(retriever_module, "get_embeddings", FakeEmbeddings)
+    monkeypatch.setattr(retriever_module, "get_reranker", FakeReranker)
+
+    retriever = HybridRetriever(dense_k=2, final_k=2, registry=registry)
+    hits = retriever.search("vacation policy")
+
+    assert retriever.skipped == []
+    assert retriever.degraded == []
+    assert len(hits) == 1
+
+    # Without a deadline, a load that outlasts RAG_LOAD_TIMEOUT is skipped.
+    registry.evict("hr")
+    monkeypatch.setattr(retriever_module, "RAG_LOAD_TIMEOUT", 0.1)
+    start = time.monotonic()
+    retriever.search("vacation policy")
+    assert time.monotonic() - start < 0.3
+    assert retriever.skipped == ["hr"]
+
+    registry.evict("hr")
+    assert registry.preload() == ["hr"]
+    assert registry.loaded() == ["hr"]
+
+
+def test_slow_collections_cost_one_timeout(monkeypatch):
+    """
+    Every collection's timeout runs from its own load, not from when the
+    previous collections were done: N stuck collections cost one timeout.
+    """
+
+    stores = {
+        name: _store(f"Vacation policy of team {name}.")
+        for name in ("a", "b", "c", "d")
+    }
+    configs = {
+        name: CollectionConfig(name, name, f"{name}.pdf", timeout=0.3)
+        for name in stores
+    }
+
+    def loader(config):
+        store = stores[config.name]
+        return KnowledgeBase(
+            config, store, BM25Index(store), FakeVectorStore(store, delay=2.0)
+        )
+
+    registry = CollectionRegistry(configs, loader)
+    registry.preload()
+    monkeypatch.setattr(retriever_module, "get_embeddings", FakeEmbeddings)
+    monkeypatch.setattr(retriever_module, "get_reranker", FakeReranker)
+
+    retriever = HybridRetriever(dense_k=2, final_k=4, registry=registry)
+    start = time.monotonic()
+    hits = retriever.search("vacation policy")
+
+    assert time.monotonic() - start < 0.6
+    assert retriever.degraded == [f"bm25_only:{name}" for name in stores]
+    assert len(hits) == 4
+
+
+def test_fork_reset_keeps_loaded_collections(monkeypatch):
+    """
+    After fork, loaded collections stay in memory (shared with the
+    parent); only their vector store connections are dropped.
+    """
+
+    store = _store("Vacation policy allows 25 days per year.")
+    configs = {"hr": CollectionConfig("hr", "hr", "hr.pdf")}
+    registry = CollectionRegistry(
+        configs,
+        lambda cfg: KnowledgeBase(cfg, store, BM25Index(store), FakeVectorStore(store)),
+    )
+    knowledge_base = registry.get("hr")
+    monkeypatch.setattr(retriever_module, "_REGISTRY", registry)
+    monkeypatch.setattr(retriever_module, "_WATCHER", None)
+    monkeypatch.setattr(retriever_module, "_FANOUT", None)
+    monkeypatch.setattr(retriever_module, "_LOCAL", None)
+    monkeypatch.setattr(retriever_module, "get_vector_store", lambda name: name)
+
+    retriever_module._reset_after_fork()
+
+    assert registry.peek("hr") is knowledge_base
+    assert knowledge_base.vector_store == "hr"
+
+
+def test_retriever_degrades_under_deadline(monkeypatch):
+    """
+    Close to the deadline, late dense searches fall back to BM25 and
+    reranking is skipped.
+    """
+
+    stores = {
+        "hr": _store("Vacation policy allows 25 days per year."),
+        "eng": _store("Deploy policy requires two reviewers."),
+    }
+    configs = {name: CollectionConfig(name, name, f"{name}.pdf") for name in stores}
+
+    def loader(config):
+        store = stores[config.name]
+        return KnowledgeBase(
+            config, store, BM25Index(store), FakeVectorStore(store, delay=0.5)
+        )
+
+    registry = CollectionRegistry(configs, loader)
+    monkeypatch.setattr(retriever_module, "get_embeddings", FakeEmbeddings)
+    monkeypatch.setattr(retriever_module, "get_reranker", FakeReranker)
+
+    retriever = HybridRetriever(dense_k=2, final_k=2, registry=registry)
+    start = time.monotonic()
+    hits = retriever.search("vacation policy", deadline=time.time() + 0.1)
+
+    assert time.monotonic() - start < 0.4
+    assert retriever.degraded == ["bm25_only:hr", "bm25_only:eng", "rerank_skipped"]
+    assert len(hits) == 2
+
+
+def test_stalled_dense_searches_do_not_delay_bm25(monkeypatch):
+    """
+    Dense searches stuck on the vector backend occupy the dense pool, but
+    concurrent queries still answer from BM25 by their deadline.
+    """
+
+    store = _store("Vacation policy allows 25 days per year.")
+    configs = {"hr": CollectionConfig("hr", "hr", "hr.pdf", timeout=5.0)}
+    registry = CollectionRegistry(
+        configs,
+        lambda cfg: KnowledgeBase(
+            cfg, store, BM25Index(store), FakeVectorStore(store, delay=1.5)
+        ),
+    )
+    registry.preload()
+    dense_pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(retriever_module, "_FANOUT", dense_pool)
+    monkeypatch.setattr(retriever_module, "_LOCAL", None)
+    monkeypatch.setattr(retriever_module, "get_embeddings", FakeEmbeddings)
+    monkeypatch.setattr(retriever_module, "get_reranker", FakeReranker)
+
+    results = []
+
+    def query():
+        retriever = HybridRetriever(dense_k=2, final_k=2, registry=registry)
+        start = time.monotonic()
+        hits = retriever.search("vacation policy", deadline=time.time() + 0.3)
+        results.append((time.monotonic() - start, retriever.degraded, len(hits)))
+
+    threads = [threading.Thread(target=query) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 3
+    for latency, degraded, hits in results:
+        assert latency < 0.6
+        assert degraded[0] == "bm25_only:hr"
+        assert hits == 1
+    dense_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def test_late_rerank_batch_keeps_the_fused_order(monkeypatch):
+    """
+    A request does not wait past its deadline for the shared
+    cross-encoder; it keeps the fused order instead.
+    """
+
+    class SlowCrossEncoder:
+        def predict(self, pairs, batch_size):
+            time.sleep(1.0)
+            return [0.0] * len(pairs)
+
+    store = _store("Vacation policy allows 25 days per year.")
+    configs = {"hr": CollectionConfig("hr", "hr", "hr.pdf")}
+    registry = CollectionRegistry(
+        configs,
+        lambda cfg: KnowledgeBase(cfg, store, BM25Index(store), FakeVectorStore(store)),
+    )
+    reranker = BatchedReranker(SlowCrossEncoder())
+    monkeypatch.setattr(retriever_module, "RAG_RERANK_MIN_TIME", 0.0)
+    monkeypatch.setattr(retriever_module, "get_embeddings", FakeEmbeddings)
+    monkeypatch.setattr(retriever_module, "get_reranker", lambda: reranker)
+
+    retriever = HybridRetriever(dense_k=2, final_k=2, registry=registry)
+    start = time.monotonic()
+    hits = retriever.search("vacation policy", deadline=time.time() + 0.3)
+
+    assert time.monotonic() - start < 0.8
+    assert retriever.degraded == ["rerank_skipped"]
+    assert len(hits) == 1
+
+
+def test_corpus_reload_swaps_versions_without_disturbing_queries(monkeypatch):
+    """
+    A newly published corpus version is swapped in; a query holding the
+    old version keeps it, and at most two versions are loaded at a time.
+    """
+
+    texts = {
+        "v1": "Vacation policy allows 25 days per year.",
+        "v2": "Vacation policy allows 30 days per year.",
+        "v3": "Vacation policy allows 35 days per year.",
+    }
+    published = {"version": "v1"}
+
+    def read_version(collection):
+        version = published["version"]
+        return CorpusVersion(version, f"{collection}__{version}")
+
+    def loader(config):
+        store = _store(texts[published["version"]])
+        return KnowledgeBase(
+            config, store, BM25Index(store), FakeVectorStore(store),
+            version=published["version"],
+        )
+
+    swaps = []
+    monkeypatch.setattr(retriever_module, "read_corpus_version", read_version)
+    monkeypatch.setattr(retriever_module, "get_embeddings", FakeEmbeddings)
+    monkeypatch.setattr(retriever_module, "get_reranker", FakeReranker)
+    monkeypatch.setattr(retriever_module, "_SWAP_LISTENERS", [swaps.append])
+
+    registry = CollectionRegistry({"hr": CollectionConfig("hr", "hr", "hr.pdf")}, loader)
+    watcher = CorpusWatcher(registry, interval=60)
+    retriever = HybridRetriever(dense_k=1, final_k=1, registry=registry)
+
+    hits = retriever.search("vacation days")
+    assert retriever.versions == {"hr": "v1"}
+
+    published["version"] = "v2"
+    assert watcher.check() == ["hr"]
+    # The running query's hits still read version 1.
+    assert "25 days" in retriever.text(hits[0])
+
+    # Version 1 is still in use: version 3 has to wait.
+    published["version"] = "v3"
+    assert watcher.check() == []
+    assert registry.peek("hr").version == "v2"
+
+    del hits
+    assert watcher.check() == ["hr"]
+
+    docs = retriever.retrieve("vacation days")
+    assert retriever.versions == {"hr": "v3"}
+    assert docs[0].metadata["corpus_version"] == "v3"
+    assert "35 days" in docs[0].page_content
+    # Listeners (e.g. prefork re-forking) ran once per swap.
+    assert swaps == [["hr"], ["hr"]]
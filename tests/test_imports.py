@@ -0,0 +1,48 @@
+"""
+Test Import Hygiene
+-------------------
+Importing the graph (or anything that does not need models) must not
+pull in torch, transformers, Qdrant or LangGraph.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+HEAVY_MODULES = [
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "langchain_huggingface",
+    "langchain_qdrant",
+    "qdrant_client",
+    "langgraph",
+]
+
+
+@pytest.mark.parametrize(
+    "module",
+    ["app.graph.graph", "app.rag.retriever", "app.startup"],
+)
+def test_import_does_not_load_heavy_dependencies(module):
+    """
+    Heavy dependencies are only imported on first use.
+    """
+
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == ""
@@ -0,0 +1,124 @@
+"""
+Test Versioned Ingestion
+------------------------
+Tests how ingest publishes corpus versions, using fake indexes: no
+embedding model or vector database is needed.
+"""
+
+import pytest
+
+from app.rag import chunk_store, ingest
+from app.rag.collection_registry import CollectionConfig
+from app.rag.corpus_version import (
+    CorpusVersion,
+    publish_corpus_version,
+    read_corpus_version,
+    source_version,
+    versioned_name,
+)
+
+
+@pytest.fixture
+def index_dir(monkeypatch, tmp_path):
+    """Chunk stores under tmp_path; index builds are only recorded."""
+    monkeypatch.setattr(chunk_store, "CHUNK_STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(ingest, "CHUNK_STORE_DIR", str(tmp_path))
+
+    built = []
+
+    def fake_ingest_index(config, index_name):
+        built.append(index_name)
+        store_path = tmp_path / index_name
+        store_path.mkdir(exist_ok=True)
+        (store_path / chunk_store._MANIFEST).write_text("{}")
+
+    monkeypatch.setattr(ingest, "_ingest_index", fake_ingest_index)
+    monkeypatch.setattr(ingest, "list_vector_indexes", lambda: [])
+    monkeypatch.setattr(ingest, "delete_vector_index", lambda name: None)
+    return tmp_path, built
+
+
+def _config(tmp_path, text="v1"):
+    source = tmp_path / "source.pdf"
+    source.write_text(text)
+    return CollectionConfig("docs", "docs", str(source))
+
+
+def test_legacy_index_is_adopted_as_unversioned_and_rebuilt(index_dir):
+    """
+    An index ingested before versioning is not labelled with the current
+    source version: the source is rebuilt under a versioned name.
+    """
+
+    tmp_path, built = index_dir
+    config = _config(tmp_path)
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / chunk_store._MANIFEST).write_text("{}")
+
+    ingest.ingest_collection(config)
+
+    version = source_version(config.source_path)
+    assert built == [versioned_name("docs", version)]
+    assert read_corpus_version("docs") == CorpusVersion(
+        version, versioned_name("docs", version)
+    )
+
+
+def test_unchanged_source_publishes_nothing(index_dir):
+    """
+    Re-running ingest on an unchanged source keeps the published version.
+    """
+
+    tmp_path, built = index_dir
+    config = _config(tmp_path)
+    version = source_version(config.source_path)
+    published = CorpusVersion(version, versioned_name("docs", version))
+    publish_corpus_version("docs", published)
+
+    ingest.ingest_collection(config)
+
+    assert built == [published.index_name]
+    assert read_corpus_version("docs") == published
+
+
+def test_old_versions_are_kept_for_the_grace_period(index_dir, monkeypatch):
+    """
+    Servers may lag several versions behind: retired versions survive
+    later ingests until their grace period is over.
+    """
+
+    tmp_path, built = index_dir
+    for text in ("v1", "v2", "v3"):
+        ingest.ingest_collection(_config(tmp_path, text))
+
+    assert all((tmp_path / name).is_dir() for name in built)
+    assert read_corpus_version("docs").index_name == built[-1]
+
+    monkeypatch.setattr(ingest, "RAG_VERSION_GRACE", 0.0)
+    ingest.ingest_collection(_config(tmp_path, "v3"))
+
+    assert sorted(p.name for p in tmp_path.iterdir() if p.name.startswith("docs__")) == [
+        built[-1]
+    ]
+
+
+def test_replaced_legacy_index_is_pruned_after_the_grace_period(index_dir, monkeypatch):
+    """
+    The adopted unversioned indexes are retired like any other version
+    once a versioned build replaces them.
+    """
+
+    tmp_path, built = index_dir
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / chunk_store._MANIFEST).write_text("{}")
+    (tmp_path / "docs.vectors").mkdir()
+
+    ingest.ingest_collection(_config(tmp_path))
+    assert (tmp_path / "docs").is_dir()
+
+    monkeypatch.setattr(ingest, "RAG_VERSION_GRACE", 0.0)
+    ingest.ingest_collection(_config(tmp_path))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "docs.version", built[-1], "source.pdf"
+    ]
@@ -0,0 +1,72 @@
+"""
+Test LLM Client
+---------------
+Tests the speculative decoding configuration (no model is loaded).
+"""
+
+import pytest
+
+from app.llm import llm_client
+
+
+def test_decoding_kwargs_per_mode(monkeypatch):
+    """
+    Each LLM_SPECULATIVE mode maps to the matching generate() kwargs.
+    """
+
+    monkeypatch.delenv("LLM_SPECULATIVE", raising=False)
+    monkeypatch.setenv("LLM_PROMPT_LOOKUP_TOKENS", "5")
+    monkeypatch.setattr(llm_client, "get_draft_model", lambda: "draft-model")
+
+    assert llm_client.get_decoding_kwargs() == {}
+    assert llm_client.get_decoding_kwargs("prompt_lookup") == {
+        "prompt_lookup_num_tokens": 5
+    }
+    assert llm_client.get_decoding_kwargs("draft") == {
+        "assistant_model": "draft-model"
+    }
+
+    with pytest.raises(ValueError):
+        llm_client.get_decoding_kwargs("beam")
+
+
+def test_truncate_at_stops():
+    """
+    Output is cut at chat markers and right after the first stop phrase.
+    """
+
+    no_answer = "The document does not provide a clear answer."
+
+    assert llm_client.truncate_at_stops(
+        "<|im_start|>assistant\nAgents plan.<|im_end|>\n<|im_start|>user\nMore"
+    ) == "Agents plan."
+    assert llm_client.truncate_at_stops(
+        f"{no_answer} However, agents usually plan.", (no_answer,)
+    ) == no_answer
+    assert llm_client.truncate_at_stops("rag", (no_answer,)) == "rag"
+
+
+def test_eos_ids_are_computed_once(monkeypatch):
+    """
+    The end-of-turn lookup builds the whole vocabulary; it runs once,
+    not on every generate() call.
+    """
+
+    class FakeTokenizer:
+        eos_token_id = 2
+        vocab_calls = 0
+
+        def get_vocab(self):
+            FakeTokenizer.vocab_calls += 1
+            return {llm_client.END_OF_TURN: 7, "<eos>": 2}
+
+        def convert_tokens_to_ids(self, token):
+            return self.get_vocab()[token]
+
+    monkeypatch.setattr(llm_client, "_TOKENIZER", FakeTokenizer())
+    monkeypatch.setattr(llm_client, "_EOS_IDS", None)
+
+    assert llm_client.get_eos_ids() == [2, 7]
+    calls = FakeTokenizer.vocab_calls
+    assert llm_client.get_eos_ids() == [2, 7]
+    assert FakeTokenizer.vocab_calls == calls
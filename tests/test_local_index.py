@@ -0,0 +1,80 @@
+"""
+Test Local Vector Index
+-----------------------
+Tests the in-process vector backend: exact and IVF search, persistence,
+and the VectorStore adapter used by the retriever.
+"""
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.rag.chunk_store import ChunkStore
+from app.rag.loader import add_derived_fields
+from app.rag.local_index import LocalVectorStore, VectorIndex
+
+
+class FakeEmbeddings:
+    """Bag-of-words vectors over a tiny fixed vocabulary."""
+
+    VOCAB = ["vacation", "policy", "deploy", "reviewers", "weather", "days"]
+
+    def embed_query(self, text):
+        words = text.lower().replace(".", "").split()
+        return [float(words.count(w)) + 1e-3 for w in self.VOCAB]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+
+def test_local_vector_store_persists_and_returns_chunks(tmp_path):
+    """
+    Ingested chunks are found by meaning, served memory-mapped after reopening.
+    """
+
+    docs = [
+        Document(page_content=t, metadata={"page": i})
+        for i, t in enumerate([
+            "Vacation policy allows 25 days.",
+            "Deploy policy requires two reviewers.",
+            "Weather data comes from an API.",
+        ])
+    ]
+    add_derived_fields(docs, count_tokens=lambda t: len(t.split()))
+    chunks = ChunkStore.from_documents(docs)
+    chunks.save(str(tmp_path / "kb"))
+
+    path = str(tmp_path / "kb.vectors")
+    store = LocalVectorStore(FakeEmbeddings(), path=path, chunks=chunks)
+    store.add_documents(chunks.documents(range(len(chunks))))
+
+    reopened = LocalVectorStore(
+        FakeEmbeddings(), path=path, chunk_store_path=str(tmp_path / "kb")
+    )
+    hits = reopened.similarity_search("deploy reviewers", k=2)
+
+    assert len(reopened) == 3
+    assert isinstance(reopened.index.vectors, np.memmap)
+    assert hits[0].page_content == "Deploy policy requires two reviewers."
+    assert hits[0].metadata["chunk_id"] == 1
+
+
+def test_ivf_search_matches_exact_search():
+    """
+    The IVF index finds (nearly) the same neighbours as exact search.
+    """
+
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 32))
+    vectors = centers[rng.integers(0, 20, 4000)] + 0.3 * rng.normal(size=(4000, 32))
+    queries = centers[rng.integers(0, 20, 50)] + 0.3 * rng.normal(size=(50, 32))
+
+    exact = VectorIndex.build(vectors, range(4000), ivf_min_size=10**9)
+    ivf = VectorIndex.build(vectors, range(4000), ivf_min_size=1000)
+
+    assert exact.centroids is None and ivf.centroids is not None
+
+    recall = np.mean([
+        len({c for c, _ in e} & {c for c, _ in a}) / 10
+        for e, a in zip(exact.search(queries, 10), ivf.search(queries, 10))
+    ])
+    assert recall >= 0.9
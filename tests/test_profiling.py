@@ -0,0 +1,118 @@
+"""
+Test Profiling
+--------------
+Tests on-demand / sampled profiling of a single invocation.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from app.evaluation import profiling
+
+
+def _work():
+    deadline = time.monotonic() + 0.05
+    while time.monotonic() < deadline:
+        sum(range(1000))
+
+
+def test_unsampled_requests_are_not_profiled(monkeypatch, tmp_path):
+    """
+    Without a request or a sample hit, nothing is profiled or written.
+    """
+
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 0.0)
+
+    assert profiling.choose_mode() is None
+    with profiling.profiled(profiling.choose_mode()) as prefix:
+        _work()
+
+    assert prefix is None
+    assert os.listdir(tmp_path) == []
+
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+    assert profiling.choose_mode() == profiling.PROFILE_MODE
+    with pytest.raises(ValueError):
+        profiling.choose_mode("gdb")
+
+
+@pytest.mark.parametrize("mode, suffixes", [
+    ("cprofile", (".prof", ".txt")),
+    ("stack", (".collapsed",)),
+])
+def test_profiled_block_writes_reports(monkeypatch, tmp_path, mode, suffixes):
+    """
+    A profiled block writes its reports under PROFILE_DIR.
+    """
+
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+
+    with profiling.profiled(mode, name="test") as prefix:
+        _work()
+
+    for suffix in suffixes:
+        assert os.path.getsize(prefix + suffix) > 0
+    if mode == "stack":
+        with open(prefix + ".collapsed") as f:
+            assert "_work (test_profiling.py" in f.read()
+
+
+def test_process_wide_profiles_do_not_overlap(monkeypatch, tmp_path):
+    """
+    A second cprofile / torch profile is refused while one runs (they are
+    process-wide); sampled requests skip it instead.
+    """
+
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "PROFILE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(profiling, "PROFILE_MODE", "cprofile")
+
+    inside, release = threading.Event(), threading.Event()
+    errors = []
+
+    def first_request():
+        with profiling.profiled("cprofile", name="first"):
+            inside.set()
+            release.wait(5)
+
+    def second_request():
+        try:
+            with profiling.profiled("cprofile", name="second"):
+                _work()
+        except profiling.ProfilerBusyError as e:
+            errors.append(e)
+
+    first = threading.Thread(target=first_request)
+    first.start()
+    assert inside.wait(5)
+
+    second = threading.Thread(target=second_request)
+    second.start()
+    second.join()
+    assert profiling.choose_mode() is None
+
+    release.set()
+    first.join()
+    assert len(errors) == 1
+    assert profiling.choose_mode() == "cprofile"
+
+    # The lock is free again: the next profile runs.
+    with profiling.profiled("cprofile", name="third") as prefix:
+        _work()
+    assert os.path.getsize(prefix + ".prof") > 0
+
+    monkeypatch.setattr(profiling.importlib.util, "find_spec", lambda name: object())
+    monkeypatch.setattr(profiling, "PROFILE_MODE", "torch")
+    with profiling._EXCLUSIVE_LOCKS["torch"]:
+        assert profiling.choose_mode() is None
+        with pytest.raises(profiling.ProfilerBusyError):
+            with profiling.profiled("torch"):
+                pass
+
+    monkeypatch.setattr(profiling.importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(ValueError, match="not installed"):
+        profiling.validate_mode("torch")
@@ -31,7 +31,7 @@ def test_retriever_returns_relevant_documents(monkeypatch):
     # Monkeypatch get_vector_store to use test store
     monkeypatch.setattr(
         "app.rag.retriever.get_vector_store",
-        lambda: test_store
+        lambda collection_name=None: test_store
     )
 
     retriever = HybridRetriever()
@@ -0,0 +1,44 @@
+"""
+Test Retrieval Sweep
+--------------------
+Tests the metric and Pareto-frontier helpers of the sweep tool.
+"""
+
+from app.evaluation.retrieval_sweep import (
+    match_snippets,
+    pareto_frontier,
+    percentile,
+    score_question,
+)
+
+
+def test_recall_and_reciprocal_rank():
+    """
+    Snippet matching is case/whitespace-insensitive and feeds recall & MRR.
+    """
+
+    matches = match_snippets(
+        ["Unrelated text.", "Agents  PLAN and act.", "They also reflect."],
+        ["agents plan", "reflect", "never retrieved"],
+    )
+    scores = score_question(matches, n_relevant=3)
+
+    assert matches == [set(), {0}, {1}]
+    assert scores["recall"] == 2 / 3
+    assert scores["rr"] == 0.5
+
+
+def test_pareto_frontier_drops_dominated_configs():
+    """
+    A config that is worse on quality and cost is not on the frontier.
+    """
+
+    def row(recall, p95, tokens):
+        return {"recall": recall, "mrr": recall, "p95_ms": p95,
+                "context_tokens": tokens}
+
+    rows = [row(0.9, 100, 900), row(0.8, 50, 500), row(0.7, 120, 950)]
+
+    assert pareto_frontier(rows) == [True, True, False]
+    assert percentile([10, 20, 30, 40], 50) == 20
+    assert percentile([10, 20, 30, 40], 95) == 40
@@ -4,8 +4,11 @@ Test Weather API
 Tests the weather API utility using mocking to avoid real HTTP calls.
 """
 
+import time
+
 import pytest
 import requests
+from app.graph.weather_node import weather_node
 from app.utils.weather_api import fetch_weather, WeatherAPIError
 
 
@@ -41,3 +44,24 @@ def test_fetch_weather_api_error(mocker):
 
     with pytest.raises(WeatherAPIError):
         fetch_weather("Delhi")
+
+
+def test_weather_node_degrades_near_deadline(mocker, monkeypatch):
+    """
+    The weather call uses the remaining budget; a timeout degrades the
+    answer instead of failing the request.
+    """
+
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "x")
+    mock_get = mocker.patch("requests.get")
+    mock_get.side_effect = requests.Timeout("read timed out")
+
+    state = weather_node({
+        "query": "Weather in Delhi?",
+        "deadline": time.time() + 2,
+        "degraded": [],
+    })
+
+    assert mock_get.call_args.kwargs["timeout"] <= 2
+    assert state["degraded"] == ["weather_timeout"]
+    assert state["context"] == []